@@ -25,6 +25,37 @@ def is_valid_char(ch):
         return False
     return ch.isprintable() and ch not in PUNCT_SET
 
+def strip_punct_text(text):
+    """
+    Remove all punctuation and abnormal characters from one line of text.
+    """
+    return ''.join(ch for ch in text if is_valid_char(ch))
+
+class PunctTable(dict):
+    """
+    str.translate table that drops Unicode punctuation except the characters
+    in keep; each character is classified once, on first use.
+    """
+    def __init__(self, keep):
+        super().__init__()
+        self.keep = keep
+
+    def __missing__(self, code):
+        ch = chr(code)
+        value = '' if unicodedata.category(ch).startswith('P') and ch not in self.keep else ch
+        self[code] = value
+        return value
+
+PUNCT_KEEP_NUMBER_MARKS = PunctTable(set('-./%'))
+PUNCT_ALL = PunctTable(set())
+
+def strip_unicode_punct(text, keep_number_marks=False):
+    """
+    Remove Unicode punctuation from text, optionally keeping the marks that
+    are part of numbers (- . / %).
+    """
+    return text.translate(PUNCT_KEEP_NUMBER_MARKS if keep_number_marks else PUNCT_ALL)
+
 def strip_all_punct(path):
     path = pathlib.Path(path).expanduser()
     if not path.exists():
@@ -40,7 +71,7 @@ def strip_all_punct(path):
             continue
         key, text = line.split('\t', 1)
         # Remove all punctuation and abnormal characters
-        text = ''.join(ch for ch in text if is_valid_char(ch))
+        text = strip_punct_text(text)
         cleaned_lines.append(f'{key}\t{text}')
 
     path.write_text('\n'.join(cleaned_lines) + '\n', encoding='utf-8')
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import http.client
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class EvaluationClient:
+    """
+    Client of eval_server.py, over a Unix socket path or host:port.
+
+        client = EvaluationClient(unix_socket="/tmp/eval.sock")
+        client.score("test_asr_en.jsonl", {"utt1": "hello world"}, tasks=["asr"])
+    """
+    def __init__(self, host="127.0.0.1", port=8765, unix_socket=None, timeout=None):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None):
+        if self.unix_socket:
+            conn = UnixHTTPConnection(self.unix_socket, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+            conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            result = json.loads(response.read())
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise RuntimeError(result.get("error", f"HTTP {response.status}"))
+        return result
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def score(self, gt, predictions=None, pred_file=None, language="en", tasks=None, verbose=False, **options):
+        """
+        Score predictions ({key: text}) or pred_file against the GT JSONL at gt.
+        Returns {"tasks": {task_name: task_result}, "elapsed": seconds}.
+        """
+        return self._request("POST", "/score", _score_request(gt, predictions, pred_file, language, tasks, verbose, options))
+
+    def score_many(self, requests):
+        """
+        Send several score requests (dicts as built by score()) in one batch.
+        """
+        return self._request("POST", "/score", {"requests": requests})["responses"]
+
+
+def _score_request(gt, predictions, pred_file, language, tasks, verbose, options):
+    request = {"gt": os.path.abspath(gt), "language": language, "verbose": verbose}
+    if predictions is not None:
+        request["predictions"] = predictions
+    else:
+        request["pred_file"] = os.path.abspath(pred_file)
+    if tasks:
+        request["tasks"] = list(tasks)
+    request.update(options)
+    return request
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score prediction files with a running eval_server.py")
+    parser.add_argument("gt_json", help="Ground truth JSON file")
+    parser.add_argument("pred_txt", nargs="+", help="Prediction TXT file(s)")
+    parser.add_argument("--language", default="en", help="Normalization language (default: en)")
+    parser.add_argument("--tasks", type=str, default=None, help="Comma separated GT tasks to score (default: all)")
+    parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Server port (default: 8765)")
+    parser.add_argument("--unix_socket", type=str, default=None, help="Server Unix socket path")
+    parser.add_argument("--verbose", action="store_true", help="Print the evaluation log of the server")
+    args = parser.parse_args()
+
+    client = EvaluationClient(args.host, args.port, args.unix_socket)
+    tasks = args.tasks.split(',') if args.tasks else None
+    requests = [_score_request(args.gt_json, None, pred_file, args.language, tasks, args.verbose, {})
+                for pred_file in args.pred_txt]
+    responses = client.score_many(requests)
+    failed = False
+    for pred_file, response in zip(args.pred_txt, responses):
+        if args.verbose and "log" in response:
+            print(response.pop("log"), end="")
+        if "error" in response:
+            failed = True
+        print(json.dumps({"prediction": pred_file, **response}, ensure_ascii=False, indent=2))
+    sys.exit(1 if failed else 0)
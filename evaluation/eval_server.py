@@ -0,0 +1,317 @@
+import os
+import io
+import sys
+import json
+import time
+import queue
+import shutil
+import hashlib
+import tempfile
+import argparse
+import threading
+import contextlib
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from evaluator import Evaluator
+from config import CONFIG
+from run_evaluation import load_gt_by_task, get_task_name, format_task_result, build_task_data, gt_fingerprint
+
+
+class EvaluationService:
+    """
+    Evaluation state kept warm between requests: one Evaluator (normalizers,
+    rule maps, number caches) per language, the parsed GT sets and the
+    reference stores of their normalized ASR references.
+
+    Score requests are queued and handled by a single scoring thread. Every
+    time it wakes up it takes all pending requests and groups them by (GT
+    file, language). Each group is prepared once: the GT is checked for
+    changes and its ASR reference store is opened and fingerprinted. The
+    requests of the group are then scored one after another against that
+    preparation; only their hypotheses are normalized and aligned.
+    """
+    def __init__(self, store_dir, workers=1, cs_alignment="single", batch=True, label_synonyms=None):
+        self.store_dir = store_dir
+        self.label_synonyms = label_synonyms
+        self.workers = workers
+        self.batch = batch
+        self.cs_alignment = cs_alignment
+        self.evaluators = {}
+        self.gt_sets = {}
+        self.num_requests = 0
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._serve_queue, daemon=True)
+        self.thread.start()
+
+    def evaluator(self, language):
+        evaluator = self.evaluators.get(language)
+        if evaluator is None:
+            evaluator = self.evaluators[language] = Evaluator(CONFIG, language=language, label_synonyms=self.label_synonyms)
+        return evaluator
+
+    def warm_up(self, language):
+        """
+        Create the evaluator of language and load its normalizer rule maps,
+        which Evaluator otherwise builds on the first ASR request.
+        """
+        evaluator = self.evaluator(language)
+        if language == "cs":
+            evaluator.codeswitch_preprocessors
+        else:
+            evaluator.preprocessor
+        return evaluator
+
+    def gt_set(self, gt_json):
+        """
+        Parsed GT columns of gt_json, re-read when the file changed.
+        """
+        stamp = os.stat(gt_json).st_mtime_ns
+        cached = self.gt_sets.get(gt_json)
+        if cached is None or cached[0] != stamp:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cached = self.gt_sets[gt_json] = (stamp, load_gt_by_task(gt_json))
+        return cached[1]
+
+    def store_path(self, gt_json, language):
+        name = hashlib.blake2b(os.path.abspath(gt_json).encode('utf-8'), digest_size=8).hexdigest()
+        return os.path.join(self.store_dir, f"{name}.{language}.refstore")
+
+    def prepare(self, gt_json, language):
+        """
+        (GT columns, reference store of the ASR references or None, GT
+        fingerprint) shared by the requests against gt_json in language. The
+        store is built on the first call and only reopened when the
+        references change.
+        """
+        fingerprint = gt_fingerprint(gt_json)
+        task_dict = self.gt_set(gt_json)
+        columns = task_dict.get("asr")
+        store = None
+        if columns is not None and language != "cs":
+            records = [(key, ref, "") for key, ref in zip(columns["key"], columns["target"])]
+            with contextlib.redirect_stdout(io.StringIO()):
+                store = self.evaluator(language).prepare_asr_references(self.store_path(gt_json, language),
+                                                                        records, language)
+        return task_dict, store, fingerprint
+
+    def preload(self, gt_json, language):
+        """
+        Parse gt_json and normalize its ASR references ahead of the first request.
+        """
+        self.prepare(gt_json, language)
+
+    def score(self, request):
+        """
+        Score one request synchronously on the scoring thread and return its response.
+        """
+        done = threading.Event()
+        slot = {"request": request, "done": done}
+        self.pending.put(slot)
+        done.wait()
+        return slot["response"]
+
+    def _serve_queue(self):
+        while True:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            groups = {}
+            for slot in batch:
+                request = slot["request"]
+                groups.setdefault((request.get("gt"), request.get("language", "en")), []).append(slot)
+            for (gt_json, language), slots in groups.items():
+                try:
+                    prepared = self.prepare(gt_json, language)
+                    error = None
+                except Exception as e:
+                    error = {"error": f"{type(e).__name__}: {e}"}
+                for slot in slots:
+                    if error is not None:
+                        slot["response"] = error
+                    else:
+                        try:
+                            slot["response"] = self._score(slot["request"], *prepared)
+                        except Exception as e:
+                            slot["response"] = {"error": f"{type(e).__name__}: {e}"}
+                    slot["done"].set()
+
+    def _score(self, request, task_dict, store, fingerprint):
+        """
+        request: {"gt": GT JSONL path, "predictions": {key: text} or
+        "pred_file": path, optional "language" (default en), "tasks" (GT task
+        names to score, default all), "batch" (vectorized ASR alignment),
+        "workers", "cs_alignment", "print_alignment" and "verbose" (return
+        the printed log)}.
+        task_dict, store and fingerprint are the GT preparation of its group.
+        """
+        start = time.time()
+        language = request.get("language", "en")
+        if "predictions" in request:
+            pred_dict = request["predictions"]
+        else:
+            from run_evaluation import load_pred
+            with contextlib.redirect_stdout(io.StringIO()):
+                pred_dict = load_pred(request["pred_file"])
+        wanted = request.get("tasks")
+        wanted = {task.lower() for task in wanted} if wanted else None
+        evaluator = self.evaluator(language)
+        options = {
+            "workers": request.get("workers", self.workers),
+            "export_dir": None,
+            "cs_alignment": request.get("cs_alignment", self.cs_alignment),
+            "cache": None,
+            "ref_store": store,
+            "batch": request.get("batch", self.batch),
+            "print_alignment": request.get("print_alignment", False),
+            "gt_fingerprint": fingerprint
+        }
+        results = {}
+        log = io.StringIO()
+        tmp_dir = tempfile.mkdtemp(prefix="eval_server_")
+        try:
+            with contextlib.redirect_stdout(log):
+                for task, columns in task_dict.items():
+                    task_name = get_task_name(task)
+                    if not task_name or (wanted is not None and task not in wanted and task_name not in wanted):
+                        continue
+                    task_dir = os.path.join(tmp_dir, task)
+                    os.makedirs(task_dir)
+                    data = build_task_data(task, task_name, columns, pred_dict, options, task_dir)
+                    result = evaluator.run(task_name, data, language)
+                    results[task_name] = format_task_result(task_name, result, num_samples=len(columns["key"]))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.num_requests += 1
+        response = {"tasks": results, "elapsed": round(time.time() - start, 4)}
+        if request.get("verbose"):
+            response["log"] = log.getvalue()
+        return response
+
+    def status(self):
+        return {
+            "status": "ok",
+            "languages": sorted(self.evaluators),
+            "gt_sets": sorted(self.gt_sets),
+            "num_requests": self.num_requests
+        }
+
+
+class EvaluationHandler(BaseHTTPRequestHandler):
+    """
+    GET /health -> service status
+    POST /score -> one request object, or {"requests": [...]} scored as one batch
+    """
+    def _reply(self, code, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, self.server.service.status())
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._reply(400, {"error": f"Invalid JSON: {e}"})
+            return
+        service = self.server.service
+        if "requests" in body:
+            # Queue the whole batch first so the scoring thread sees it at once
+            slots = []
+            for request in body["requests"]:
+                slot = {"request": request, "done": threading.Event()}
+                service.pending.put(slot)
+                slots.append(slot)
+            for slot in slots:
+                slot["done"].wait()
+            self._reply(200, {"responses": [slot["response"] for slot in slots]})
+        else:
+            response = service.score(body)
+            self._reply(400 if "error" in response else 200, response)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=8765, unix_socket=None, quiet=True):
+    """
+    HTTP server for service on a Unix socket path, or on host:port.
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, EvaluationHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), EvaluationHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident evaluation server")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--unix_socket", type=str, default=None, help="Listen on this Unix socket path instead of host:port")
+    parser.add_argument("--store_dir", type=str, default=None,
+                        help="Directory of the normalized reference stores (default: a temporary directory)")
+    parser.add_argument("--preload", nargs="*", default=[], help="GT JSONL files to prepare at startup")
+    parser.add_argument("--languages", type=str, default="en", help="Comma separated languages to warm up (default: en)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used for ASR WER scoring (default: 1)")
+    parser.add_argument("--cs_alignment", choices=["single", "separate"], default="single",
+                        help="Default code-switch scoring (default: single)")
+    parser.add_argument("--align", choices=["batch", "counts"], default="batch",
+                        help="Default ASR alignment engine: vectorized batches or one utterance at a time (default: batch)")
+    parser.add_argument("--label_synonyms", nargs="+", default=None,
+                        help="Synonym file(s) of SER/GR labels, one 'synonym | label' line each")
+    parser.add_argument("--verbose", action="store_true", help="Log every HTTP request")
+    args = parser.parse_args()
+
+    label_synonyms = None
+    if args.label_synonyms:
+        from label_normalizer import load_synonyms
+        label_synonyms = load_synonyms(args.label_synonyms)
+    store_dir = args.store_dir or tempfile.mkdtemp(prefix="eval_server_stores_")
+    service = EvaluationService(store_dir, workers=args.workers, cs_alignment=args.cs_alignment,
+                                batch=(args.align == "batch"), label_synonyms=label_synonyms)
+    for language in args.languages.split(','):
+        service.warm_up(language)
+        for gt_json in args.preload:
+            service.preload(gt_json, language)
+    server = make_server(service, args.host, args.port, args.unix_socket, quiet=not args.verbose)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"[Server] Listening on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+        if not args.store_dir:
+            shutil.rmtree(store_dir, ignore_errors=True)
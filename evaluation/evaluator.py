@@ -1,463 +1,102 @@
-import os
-from preprocess import Preprocessor
-from tasks.asr_wer import compute_wer
-from clean_marks import strip_all_punct
-from text_normalizer import normalize_text
-import unicodedata
-from tqdm import tqdm
-
-def _is_chinese_char(ch):
-    return '\u4e00' <= ch <= '\u9fff'
-
-def _strip_punct(text):
-    keep = set('-./%')
-    return ''.join(
-        ch for ch in text
-        if not (unicodedata.category(ch).startswith('P') and ch not in keep)
-    )
-
-def _strip_punct_all(text):
-    keep = set()
-    return ''.join(
-        ch for ch in text
-        if not (unicodedata.category(ch).startswith('P') and ch not in keep)
-    )
-
-def calc_rate(result_dict):
-    n = result_dict['all']
-    s = result_dict['sub']
-    d = result_dict['del']
-    i = result_dict['ins']
-    if n == 0:
-        return 0.0
-    return (s + d + i) / n
-
-def split_tokens(tokens):
-    zh = [t for t in tokens if all(_is_chinese_char(c) for c in t)]
-    en = [t for t in tokens if not any(_is_chinese_char(c) for c in t)]
-    return zh, en
-
-def tokenize_codeswitch(text, proc1, proc2):
-    text = _strip_punct(text)
-    tokens = []
-    buff = []
-    for ch in text:
-        if _is_chinese_char(ch):
-            if buff:
-                en_token = proc1.normalize(''.join(buff))
-                tokens.append(en_token.upper())
-                buff = []
-            zh_token = proc2.normalize(ch)
-            tokens.append(zh_token)
-        elif ch.isalnum():
-            buff.append(ch)
-        else:
-            if buff:
-                en_token = proc1.normalize(''.join(buff))
-                tokens.append(en_token.upper())
-                buff = []
-    if buff:
-        en_token = proc1.normalize(''.join(buff))
-        tokens.append(en_token.upper())
-    return tokens
+import hashlib
+from collections import OrderedDict
+from clean_marks import strip_punct_text
+from label_normalizer import LabelNormalizer
+from task_registry import TaskContext, get_plugin, run_task
+from utils import keyed_pairs
+# Each task is a plugin registered in task_registry; the normalizer, the ASR
+# scorer (numpy) and the metric backends are imported by the task that needs them.
 
 class Evaluator:
-    def __init__(self, config, language="en", ser_mapping=None, gr_mapping=None):
+    # S2TT scorers kept with their reference statistics, least recently used are dropped
+    S2TT_SCORER_CACHE_SIZE = 4
+
+    def __init__(self, config, language="en", ser_mapping=None, gr_mapping=None, label_synonyms=None):
         self.config = config
-        self.preprocessor = Preprocessor(lang=language)  
+        self.language = language
+        self._preprocessor = None
+        self._codeswitch_preprocessors = None
         self.ser_mapping = ser_mapping or {"neu": 0, "hap": 1, "ang": 2, "sad": 3}
         self.gr_mapping = gr_mapping or {"man": 0, "woman": 1}
+        # label_synonyms: extra {synonym: label} spellings, e.g. from load_synonyms
+        self.ser_labels = LabelNormalizer(self.ser_mapping, label_synonyms)
+        self.gr_labels = LabelNormalizer(self.gr_mapping, label_synonyms)
+        # Reference stores already opened by this evaluator, by (path, fingerprint)
+        self._stores = {}
+        # S2TT scorers with cached reference statistics, by (tokenizer, GT fingerprint),
+        # least recently used first
+        self._s2tt_scorers = OrderedDict()
+
+    @property
+    def preprocessor(self):
+        # Built on first use: loading the rule maps is only needed for ASR
+        if self._preprocessor is None:
+            from preprocess import Preprocessor
+            self._preprocessor = Preprocessor(lang=self.language)
+        return self._preprocessor
+
+    @property
+    def codeswitch_preprocessors(self):
+        # (en, zh) normalizers of code-switch ASR, built on first use like preprocessor
+        if self._codeswitch_preprocessors is None:
+            from preprocess import Preprocessor
+            self._codeswitch_preprocessors = (Preprocessor(lang='en'), Preprocessor(lang='zh'))
+        return self._codeswitch_preprocessors
+
+    def reference_store(self, path, refs, language):
+        """
+        ReferenceStore of the (key, text) ASR references, built at path with
+        this evaluator's normalizer unless a current one is already there.
+        """
+        from reference_store import ReferenceStore, reference_fingerprint
+        from tasks.asr_wer import asr_tokens
+        tochar = (language == "zh")
+
+        def tokenize(text):
+            return asr_tokens(strip_punct_text(self.preprocessor.normalize(text)), tochar)
+
+        fingerprint = reference_fingerprint(refs, language, tochar)
+        store = self._stores.get((path, fingerprint))
+        if store is None:
+            store = ReferenceStore.open_or_build(path, refs, tokenize, fingerprint, language)
+            self._stores[(path, fingerprint)] = store
+        return store
+
+    def prepare_asr_references(self, path, records, language):
+        """
+        Build (or reuse) the reference store of the (key, ref, hyp) ASR
+        records exactly as the ASR task will look it up.
+        """
+        refs, _ = keyed_pairs({"records": records})
+        return self.reference_store(path, refs, language)
+
+    def s2tt_scorer(self, refs, tokenize, fingerprint=None):
+        """
+        S2ttScorer of the reference lines, reused while the same references
+        are scored again (e.g. one GT set against several predictions).
+        fingerprint identifies the references, e.g. the GT file version and
+        task given by run_evaluation; without one the lines are hashed.
+        Only the S2TT_SCORER_CACHE_SIZE most recently used scorers are kept.
+        """
+        from tasks.s2tt import S2ttScorer
+        if fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for ref in refs:
+                digest.update(ref.encode('utf-8'))
+                digest.update(b'\0')
+            fingerprint = digest.hexdigest()
+        key = (tokenize, fingerprint)
+        scorer = self._s2tt_scorers.pop(key, None)
+        if scorer is None:
+            scorer = S2ttScorer(refs, tokenize)
+        self._s2tt_scorers[key] = scorer
+        while len(self._s2tt_scorers) > self.S2TT_SCORER_CACHE_SIZE:
+            self._s2tt_scorers.popitem(last=False)
+        return scorer
 
-    def _normalize_label(self, label):
-
-        label = label.strip()
-        label = _strip_punct_all(label)
-        label = label.lower()
-        synonyms = {
-            # Emotion
-            "happy": "hap",
-            "happiness": "hap",
-            "neutral": "neu",
-            "angry": "ang",
-            "anger": "ang",
-            "sadness": "sad",
-            "sad": "sad",
-            # Gender
-            "male": "man",
-            "m": "man",
-            "man": "man",
-            "female": "woman",
-            "f": "woman",
-            "woman": "woman"
-        }
-        return synonyms.get(label, label)
-    
     def run(self, task_name, data, language="en"):
-        if task_name == "asr_wer" and language == "cs":
-            ref_norm_file = "tmp_ref_norm.txt"
-            hyp_norm_file = "tmp_hyp_norm.txt"
-            ref_lines = []
-            hyp_lines = []
-            ref_zh_lines = []
-            ref_en_lines = []
-            hyp_zh_lines = []
-            hyp_en_lines = []
-            proc1 = Preprocessor(lang='en')
-            proc2 = Preprocessor(lang='zh')
-            with open(data["ref_file"], 'r', encoding='utf-8') as f:
-                ref_file_lines = f.readlines()
-            with open(data["hyp_file"], 'r', encoding='utf-8') as f:
-                hyp_file_lines = f.readlines()
-            for line in tqdm(ref_file_lines, desc="Processing reference (code-switch)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    tokens = tokenize_codeswitch(text, proc1, proc2)
-                    ref_lines.append(f"{key}\t{' '.join(tokens)}")
-                    zh, en = split_tokens(tokens)
-                    ref_zh_lines.append(f"{key}\t{' '.join(zh)}")
-                    ref_en_lines.append(f"{key}\t{' '.join(en)}")
-            for line in tqdm(hyp_file_lines, desc="Processing hypothesis (code-switch)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    tokens = tokenize_codeswitch(text, proc1, proc2)
-                    hyp_lines.append(f"{key}\t{' '.join(tokens)}")
-                    zh, en = split_tokens(tokens)
-                    hyp_zh_lines.append(f"{key}\t{' '.join(zh)}")
-                    hyp_en_lines.append(f"{key}\t{' '.join(en)}")
-            with open(ref_norm_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_lines) + '\n')
-            with open(hyp_norm_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_lines) + '\n')
-            print("Computing MER for code-switching ASR...")
-            mer_result = compute_wer(ref_norm_file, hyp_norm_file)
-
-            # CER
-            ref_zh_file = "tmp_ref_zh.txt"
-            hyp_zh_file = "tmp_hyp_zh.txt"
-            with open(ref_zh_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_zh_lines) + '\n')
-            with open(hyp_zh_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_zh_lines) + '\n')
-            print("Computing CER for Chinese part...")
-            cer_result = compute_wer(ref_zh_file, hyp_zh_file, tochar=True)
-
-            # WER
-            ref_en_file = "tmp_ref_en.txt"
-            hyp_en_file = "tmp_hyp_en.txt"
-            with open(ref_en_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_en_lines) + '\n')
-            with open(hyp_en_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_en_lines) + '\n')
-            print("Computing WER for English part...")
-            wer_result = compute_wer(ref_en_file, hyp_en_file)
-
-            mer_score = calc_rate(mer_result)
-            cer_score = calc_rate(cer_result)
-            wer_score = calc_rate(wer_result)
-
-            print(f"MER: {mer_score * 100:.2f}%")
-            print(f"Chinese CER: {cer_score * 100:.2f}%")
-            print(f"English WER: {wer_score * 100:.2f}%")
-
-            os.remove(ref_norm_file)
-            os.remove(hyp_norm_file)
-            os.remove(ref_zh_file)
-            os.remove(hyp_zh_file)
-            os.remove(ref_en_file)
-            os.remove(hyp_en_file)
-
-            return mer_score, wer_score, cer_score
-
-        if task_name == "asr_wer":
-            ref_norm_file = "tmp_ref_norm.txt"
-            hyp_norm_file = "tmp_hyp_norm.txt"
-            ref_lines = []
-            with open(data["ref_file"], 'r', encoding='utf-8') as f:
-                ref_file_lines = f.readlines()
-            with open(data["hyp_file"], 'r', encoding='utf-8') as f:
-                hyp_file_lines = f.readlines()
-            for line in tqdm(ref_file_lines, desc="Normalizing reference", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    text_norm = self.preprocessor.normalize(text)
-                    ref_lines.append(f"{key}\t{text_norm}")
-            hyp_lines = []
-            for line in tqdm(hyp_file_lines, desc="Normalizing hypothesis", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    text_norm = self.preprocessor.normalize(text)
-                    hyp_lines.append(f"{key}\t{text_norm}")
-            with open(ref_norm_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_lines) + '\n')
-            with open(hyp_norm_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_lines) + '\n')
-
-            strip_all_punct(ref_norm_file)
-            strip_all_punct(hyp_norm_file)
-            tochar = (language == "zh")
-            result = compute_wer(ref_norm_file, hyp_norm_file, tochar=tochar)
-            os.remove(ref_norm_file)
-            os.remove(hyp_norm_file)
-            return result
-        elif task_name == "ser_eval":
-            ref_labels = []
-            hyp_labels = []
-            with open(data["ref_file"], 'r', encoding='utf-8') as f:
-                ref_file_lines = f.readlines()
-            with open(data["hyp_file"], 'r', encoding='utf-8') as f:
-                hyp_file_lines = f.readlines()
-            for line in tqdm(ref_file_lines, desc="Processing reference (SER)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, label = parts
-                    norm_label = self._normalize_label(label)
-                    ref_labels.append(norm_label)
-            for line in tqdm(hyp_file_lines, desc="Processing hypothesis (SER)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, label = parts
-                    norm_label = self._normalize_label(label)
-                    mapped = None
-                    if norm_label.isdigit():
-                        for k, v in self.ser_mapping.items():
-                            if str(v) == norm_label:
-                                mapped = k
-                                break
-                    else:
-                        mapped = norm_label
-                    hyp_labels.append(mapped)
-            valid = [(r, h) for r, h in zip(ref_labels, hyp_labels) if r is not None and h is not None]
-            if not valid:
-                print("[SER] No valid labels for accuracy calculation.")
-                return None
-            correct = sum(1 for r, h in valid if r == h)
-            acc = correct / len(valid)
-            print(f"[SER] Accuracy: {acc:.4f} ({correct}/{len(valid)})")
-            return acc
-        elif task_name == "gr_eval":
-            ref_labels = []
-            hyp_labels = []
-            with open(data["ref_file"], 'r', encoding='utf-8') as f:
-                ref_file_lines = f.readlines()
-            with open(data["hyp_file"], 'r', encoding='utf-8') as f:
-                hyp_file_lines = f.readlines()
-            for line in tqdm(ref_file_lines, desc="Processing reference (GR)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, label = parts
-                    norm_label = self._normalize_label(label)
-                    ref_labels.append(norm_label)
-            for line in tqdm(hyp_file_lines, desc="Processing hypothesis (GR)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, label = parts
-                    norm_label = self._normalize_label(label)
-                    mapped = None
-                    if norm_label.isdigit():
-                        for k, v in self.gr_mapping.items():
-                            if str(v) == norm_label:
-                                mapped = k
-                                break
-                    else:
-                        mapped = norm_label
-                    hyp_labels.append(mapped)
-            valid = [(r, h) for r, h in zip(ref_labels, hyp_labels) if r is not None and h is not None]
-            if not valid:
-                print("[GR] No valid labels for accuracy calculation.")
-                return None
-            correct = sum(1 for r, h in valid if r == h)
-            acc = correct / len(valid)
-            print(f"[GR] Accuracy: {acc:.4f} ({correct}/{len(valid)})")
-            return acc
-        elif task_name == "s2tt_eval":
-            ref_lines = []
-            hyp_lines = []
-            with open(data["ref_file"], 'r', encoding='utf-8') as f:
-                ref_file_lines = f.readlines()
-            with open(data["hyp_file"], 'r', encoding='utf-8') as f:
-                hyp_file_lines = f.readlines()
-            for line in tqdm(ref_file_lines, desc="Processing reference (S2TT)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    ref_lines.append(text)
-            for line in tqdm(hyp_file_lines, desc="Processing hypothesis (S2TT)", unit="lines"):
-                parts = line.strip().split('\t', 1)
-                if len(parts) == 2:
-                    key, text = parts
-                    hyp_lines.append(text)
-            ref_txt = "tmp_ref_s2tt_bleu.txt"
-            hyp_txt = "tmp_hyp_s2tt_bleu.txt"
-            with open(ref_txt, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_lines) + '\n')
-            with open(hyp_txt, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_lines) + '\n')
-            from sacrebleu.metrics import BLEU, CHRF
-            
-            if language.lower() in ["zh", "ch", "chinese"]:
-                bleu = BLEU(tokenize='zh')
-                chrf = CHRF(word_order=2)
-            elif language.lower() in ["en", "english"]:
-                bleu = BLEU(tokenize='13a')
-                chrf = CHRF(word_order=2)
-            else:
-                bleu = BLEU(tokenize='none')
-                chrf = CHRF(word_order=2)
-            
-            score_bleu = bleu.corpus_score(hyp_lines, [ref_lines])
-            score_chrf = chrf.corpus_score(hyp_lines, [ref_lines])
-            
-            print(f"[S2TT] BLEU = {score_bleu.score:.2f}")
-            print(f"[S2TT] chrF2 = {score_chrf.score:.2f}")
-            
-            os.remove(ref_txt)
-            os.remove(hyp_txt)
-            
-            return {
-                "bleu": score_bleu.score,
-                "chrf": score_chrf.score
-            }
-        elif task_name == "slu_eval":
-            import subprocess
-            hyp_processed = "tmp_hyp_slu_processed.txt"
-            ref_processed = "tmp_ref_slu_processed.txt"
-            prompt_jsonl = data.get("prompt_jsonl")
-            subprocess.run([
-                "python", "process_prediction.py",
-                prompt_jsonl,
-                data["hyp_file"],
-                hyp_processed
-            ])
-            subprocess.run([
-                "python", "process_prediction.py",
-                prompt_jsonl,
-                data["ref_file"],
-                ref_processed
-            ])
-            ref_answers = {}
-            with open(ref_processed, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.strip().split('\t', 1)
-                    if len(parts) == 2:
-                        key, ans = parts
-                        ref_answers[key] = ans.strip().lower()
-            hyp_answers = {}
-            with open(hyp_processed, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.strip().split('\t', 1)
-                    if len(parts) == 2:
-                        key, ans = parts
-                        hyp_answers[key] = ans.strip().lower()
-            total = 0
-            correct = 0
-            for key in ref_answers:
-                if key in hyp_answers:
-                    total += 1
-                    if ref_answers[key] == hyp_answers[key]:
-                        correct += 1
-            if total == 0:
-                print("[SLU] No valid pairs for accuracy calculation.")
-                return None
-            acc = correct / total
-            print(f"[SLU] Accuracy: {acc:.4f} ({correct}/{total})")
-            os.remove(hyp_processed)
-            os.remove(ref_processed)
-            return acc
-        elif task_name == "sd_eval":
-            import meeteval
-            ref_rttm = data["ref_file"]
-            hyp_rttm = data["hyp_file"]
-            collar = data.get("collar", 0.25)
-            
-            print(f"[SD] Running DER evaluation with collar={collar}s")
-            ref = meeteval.io.load(ref_rttm)
-            hyp = meeteval.io.load(hyp_rttm)
-            result_der = meeteval.der.dscore(ref, hyp, collar=collar)
-            
-            total_error_rate = 0
-            total_sessions = 0
-            for session, der in result_der.items():
-                print(f"DER for {session}: {float(der.error_rate):.4f} "
-                    f"(missed: {float(der.missed_speaker_time):.4f}, "
-                    f"fa: {float(der.falarm_speaker_time):.4f}, "
-                    f"ser: {float(der.speaker_error_time):.4f})")
-                total_error_rate += float(der.error_rate)
-                total_sessions += 1
-            
-            avg_der = total_error_rate / total_sessions if total_sessions > 0 else 0
-            print(f"[SD] Average DER: {avg_der:.4f}")
-            
-            return {
-                "der": avg_der,
-                "num_sessions": total_sessions
-            }
-        elif task_name == "sa_asr_eval":
-            import meeteval
-            ref_stm = data["ref_file"]
-            hyp_stm = data["hyp_file"]
-            ref_norm_stm = "tmp_ref_sa_asr_norm.stm"
-            hyp_norm_stm = "tmp_hyp_sa_asr_norm.stm"
-            collar = data.get("collar", 0.5)
-
-            with open(ref_stm, 'r', encoding='utf-8') as fin:
-                ref_lines = fin.readlines()
-            with open(ref_norm_stm, 'w', encoding='utf-8') as fout:
-                for line in tqdm(ref_lines, desc="Normalizing reference (SA-ASR)", unit="lines"):
-                    parts = line.strip().split(maxsplit=5)
-                    if len(parts) == 6:
-                        norm_trans = normalize_text(parts[5], case_sensitive=False, remove_tag=True, language=language)
-                        parts[5] = norm_trans
-                        parts[3] = str(float(parts[3]))
-                        parts[4] = str(float(parts[4]))
-                        fout.write(' '.join(parts) + '\n')
-            with open(hyp_stm, 'r', encoding='utf-8') as fin:
-                hyp_lines = fin.readlines()
-            with open(hyp_norm_stm, 'w', encoding='utf-8') as fout:
-                for line in tqdm(hyp_lines, desc="Normalizing hypothesis (SA-ASR)", unit="lines"):
-                    parts = line.strip().split(maxsplit=5)
-                    if len(parts) == 6:
-                        norm_trans = normalize_text(parts[5], case_sensitive=False, remove_tag=True, language=language)
-                        parts[5] = norm_trans
-                        parts[3] = str(float(parts[3]))
-                        parts[4] = str(float(parts[4]))
-                        fout.write(' '.join(parts) + '\n')
-
-            ref = meeteval.io.load(ref_norm_stm)
-            hyp = meeteval.io.load(hyp_norm_stm)
-
-            print(f"\n[SA-ASR] Evaluation Results (collar={collar}s):")
-            print("=" * 60)
-
-            result_cpwer = meeteval.wer.cpwer(ref, hyp)
-            avg_cpwer = meeteval.wer.combine_error_rates(result_cpwer.values())
-            print(f"cpWER: {avg_cpwer.error_rate:.4f} (errors: {avg_cpwer.errors}, length: {avg_cpwer.length})")
-
-            result_der = meeteval.der.dscore(ref, hyp, collar=collar)
-            total_der = 0
-            num_sessions = 0
-            for session, der in result_der.items():
-                print(f"DER for {session}: {float(der.error_rate):.4f} "
-                    f"(missed: {float(der.missed_speaker_time):.4f}, "
-                    f"fa: {float(der.falarm_speaker_time):.4f}, "
-                    f"ser: {float(der.speaker_error_time):.4f})")
-                total_der += float(der.error_rate)
-                num_sessions += 1
-            
-            avg_der = total_der / num_sessions if num_sessions > 0 else 0
-
-            print("=" * 60)
-
-            os.remove(ref_norm_stm)
-            os.remove(hyp_norm_stm)
-            
-            return {
-                "cpwer": float(avg_cpwer.error_rate),
-                "der": avg_der,
-                "num_sessions": num_sessions
-            }
-        else:
-            print(f"[Warning] Unknown task: {task_name}")
\ No newline at end of file
+        plugin = get_plugin(task_name)
+        if plugin is None:
+            print(f"[Warning] Unknown task: {task_name}")
+            return None
+        return run_task(plugin, TaskContext(self, data, language))
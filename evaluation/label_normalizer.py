@@ -0,0 +1,86 @@
+import re
+import functools
+from clean_marks import strip_unicode_punct
+
+# Spellings of the default SER (IEMOCAP) and GR classes
+DEFAULT_SYNONYMS = {
+    # Emotion
+    "happy": "hap",
+    "happiness": "hap",
+    "neutral": "neu",
+    "angry": "ang",
+    "anger": "ang",
+    "sadness": "sad",
+    "sad": "sad",
+    # Gender
+    "male": "man",
+    "m": "man",
+    "man": "man",
+    "female": "woman",
+    "f": "woman",
+    "woman": "woman"
+}
+
+
+def clean_label(label):
+    return strip_unicode_punct(label.strip()).lower()
+
+
+def load_synonyms(paths):
+    """
+    {synonym: label} of synonym files in the .map rule format: one
+    "synonym | label" (or "synonym label") line each, # starts a comment.
+    Later lines and files win.
+    """
+    synonyms = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = re.sub(r'\s+', ' ', line.split('#', 1)[0].strip())
+                if not line:
+                    continue
+                parts = line.split('|')
+                if len(parts) != 2:
+                    parts = line.split()
+                    if len(parts) != 2:
+                        raise ValueError(f"Bad synonym line {line_no} in {path}: {line}")
+                synonyms[parts[0].strip()] = parts[1].strip()
+    return synonyms
+
+
+class LabelNormalizer:
+    """
+    Label normalization of one classification task, built once from its
+    {label: index} mapping and the synonym table (DEFAULT_SYNONYMS plus the
+    user synonyms, which win). Labels are stripped of punctuation,
+    lower-cased and looked up in the synonyms; a numeric prediction is read
+    through the inverse mapping.
+
+    classes is the canonical class list, the mapping classes in index order;
+    it is never extended, so labels outside the mapping are left to the
+    scoring run that meets them. The raw text -> label paths are memoized,
+    so a repeated label costs one dict lookup.
+    """
+    def __init__(self, mapping, synonyms=None, cache_size=65536):
+        self.mapping = mapping
+        self.synonyms = {clean_label(synonym): label.lower()
+                         for synonym, label in {**DEFAULT_SYNONYMS, **(synonyms or {})}.items()}
+        self.classes = tuple(sorted(mapping, key=lambda label: mapping[label]))
+        self.index_labels = {}
+        for label, index in mapping.items():
+            self.index_labels.setdefault(str(index), label)
+        self.reference_label = functools.lru_cache(maxsize=cache_size)(self.normalize)
+        self.prediction_label = functools.lru_cache(maxsize=cache_size)(self._prediction_label)
+
+    def normalize(self, label):
+        label = clean_label(label)
+        return self.synonyms.get(label, label)
+
+    def _prediction_label(self, text):
+        """
+        Label of a prediction, None for an index outside the mapping.
+        """
+        label = self.normalize(text)
+        if label.isdigit():
+            return self.index_labels.get(label)
+        return label
@@ -1,12 +1,23 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from normalization.asr.asr_simple_tn import asr_num2words
+from normalization.asr.asr_simple_tn import asr_num2words, load_num2words_maps
 class Preprocessor:
     def __init__(self, lang="en", map_dir=None, debug=False):
         self.lang = lang
         self.map_dir = map_dir or "normalization/asr/asr_simple_tn_rules"
         self.debug = debug
+        # Load and sort the rule maps once; every normalize() call is then pure CPU
+        self.other_map_sorted, self.digit_map_sorted = load_num2words_maps(self.map_dir, self.lang)
+        self.cached_num_map = {}
 
     def normalize(self, text):
-        return asr_num2words(text, self.lang, self.map_dir, self.debug)
\ No newline at end of file
+        return asr_num2words(
+            text,
+            self.lang,
+            self.map_dir,
+            self.debug,
+            self.other_map_sorted,
+            self.digit_map_sorted,
+            self.cached_num_map
+        )
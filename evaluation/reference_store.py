@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+from array import array
+
+import numpy as np
+
+from result_cache import normalizer_fingerprint
+from utils import tqdm
+
+STORE_VERSION = 1
+
+
+def reference_fingerprint(refs, language, tochar):
+    """
+    Digest of the normalizer (rule maps and code), the scoring options and
+    every (key, text) reference, in order.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{STORE_VERSION}\0{normalizer_fingerprint()}\0{language}\0{int(tochar)}\0".encode())
+    for key, text in refs:
+        digest.update(f"{key}\t{text}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def sidecar_path(gt_json, language):
+    return f"{gt_json}.{language}.refstore"
+
+
+class ReferenceStore:
+    """
+    Normalized ASR references kept on disk, one directory per GT set:
+
+    - meta.json: fingerprint, language and sizes
+    - strings.json: reference keys and the token vocabulary
+    - offsets.npy: int64 offsets of each reference into tokens.npy
+    - tokens.npy: token ids of all references, concatenated
+
+    The arrays are memory-mapped, so opening a store costs no normalization
+    and only the references that are scored are read.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "strings.json"), 'r', encoding='utf-8') as f:
+            strings = json.load(f)
+        self.keys = strings["keys"]
+        self.vocab = strings["vocab"]
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode='r')
+        self.token_ids = np.load(os.path.join(path, "tokens.npy"), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def ids(self, idx):
+        """
+        Token ids of reference idx as an array('i'), the alignment input format.
+        """
+        ids = array('i')
+        ids.frombytes(self.token_ids[self.offsets[idx]:self.offsets[idx + 1]].tobytes())
+        return ids
+
+    def tokens(self, idx):
+        return [self.vocab[token_id] for token_id in self.ids(idx)]
+
+    @staticmethod
+    def is_current(path, fingerprint):
+        try:
+            with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+                return json.load(f).get("fingerprint") == fingerprint
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def build(path, refs, tokenize, fingerprint, language):
+        """
+        Tokenize every (key, text) reference with tokenize(text) -> [str] and
+        write the store to path. meta.json is written last, so an interrupted
+        build is never taken for a current store.
+        """
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        vocab = {}
+        token_ids = array('i')
+        offsets = [0]
+        keys = []
+        for key, text in tqdm(refs, desc="Normalizing reference store", unit="lines"):
+            for token in tokenize(text):
+                token_id = vocab.get(token)
+                if token_id is None:
+                    token_id = vocab[token] = len(vocab)
+                token_ids.append(token_id)
+            offsets.append(len(token_ids))
+            keys.append(key)
+        np.save(os.path.join(path, "offsets.npy"), np.array(offsets, dtype=np.int64))
+        np.save(os.path.join(path, "tokens.npy"), np.frombuffer(token_ids, dtype=np.intc))
+        with open(os.path.join(path, "strings.json"), 'w', encoding='utf-8') as f:
+            json.dump({"keys": keys, "vocab": list(vocab)}, f, ensure_ascii=False)
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({
+                "fingerprint": fingerprint,
+                "language": language,
+                "num_refs": len(keys),
+                "num_tokens": len(token_ids),
+                "vocab_size": len(vocab)
+            }, f, indent=2)
+        return ReferenceStore(path)
+
+    @classmethod
+    def open_or_build(cls, path, refs, tokenize, fingerprint, language):
+        """
+        Open the store at path, rebuilding it first when it is missing or was
+        built from other references or another normalizer version.
+        """
+        if cls.is_current(path, fingerprint):
+            return cls(path)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            print(f"[RefStore] {path} is stale, rebuilding.")
+        return cls.build(path, refs, tokenize, fingerprint, language)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from run_evaluation import load_gt_by_task
+    from evaluator import Evaluator
+    from config import CONFIG
+
+    parser = argparse.ArgumentParser(description="Normalize the ASR references of a GT JSONL into a reference store")
+    parser.add_argument("gt_json", help="Ground truth JSON file")
+    parser.add_argument("--language", default="en", help="Normalization language (default: en)")
+    parser.add_argument("--out", type=str, default=None, help="Store directory (default: <gt_json>.<language>.refstore)")
+    args = parser.parse_args()
+
+    columns = load_gt_by_task(args.gt_json).get("asr")
+    if columns is None:
+        print(f"[RefStore] No ASR references in {args.gt_json}.")
+        sys.exit(1)
+    records = [(key, ref, "") for key, ref in zip(columns["key"], columns["target"])]
+    store = Evaluator(CONFIG, language=args.language).prepare_asr_references(
+        args.out or sidecar_path(args.gt_json, args.language), records, args.language)
+    print(f"[RefStore] {len(store)} references in {store.path}")
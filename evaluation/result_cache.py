@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import hashlib
+import functools
+
+# Bump when the scoring of a cached utterance changes without a change under
+# normalization/asr (e.g. tokenization or alignment in the evaluation code).
+CACHE_VERSION = 1
+
+NORMALIZER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'normalization', 'asr'))
+
+
+@functools.lru_cache(maxsize=None)
+def normalizer_fingerprint(root=NORMALIZER_DIR):
+    """
+    Digest of everything the text normalization depends on: the rule files
+    (.map, .txt) and the Python sources under normalization/asr. Any edit to
+    a rule map or to the normalizer code yields a new fingerprint.
+
+    The files are read once per process, as the rules are: a resident
+    evaluator keeps the normalizer it loaded at startup.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(CACHE_VERSION).encode())
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for filename in sorted(filenames):
+            if not filename.endswith(('.map', '.txt', '.py')):
+                continue
+            path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(path, root).encode())
+            digest.update(b'\0')
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent per-utterance ASR results in a SQLite file, content-addressed
+    by hash(normalizer fingerprint, scope, ref text, hyp text). scope carries
+    the language and the scoring mode. Each entry holds the normalized ref/hyp
+    text and the error counts of the utterance.
+
+    Opening the cache with a different normalizer fingerprint drops every
+    entry, and the least recently used entries are evicted once the cache
+    holds more than max_entries utterances.
+    """
+    def __init__(self, path, max_entries=1000000, fingerprint=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.fingerprint = fingerprint or normalizer_fingerprint()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key BLOB PRIMARY KEY, ref_norm TEXT, hyp_norm TEXT, counts TEXT, last_used INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        if self._meta("fingerprint") != self.fingerprint:
+            self.clear()
+        # Every run is one generation; entries touched by the run are stamped with it
+        self.generation = int(self._meta("generation") or 0) + 1
+        self._set_meta("generation", self.generation)
+        self.conn.commit()
+
+    def __reduce__(self):
+        # Worker processes open their own connection to the same file
+        return (self.__class__, (self.path, self.max_entries, self.fingerprint))
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def clear(self):
+        """
+        Drop every entry, e.g. after the rule maps changed.
+        """
+        self.conn.execute("DELETE FROM results")
+        self._set_meta("fingerprint", self.fingerprint)
+        self.conn.commit()
+
+    def key(self, scope, ref, hyp):
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.fingerprint, scope, ref, hyp):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.digest()
+
+    def get_many(self, keys, chunk_size=500):
+        """
+        {key: (ref_norm, hyp_norm, counts)} for the keys found in the cache;
+        the entries found are marked as used by this run.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            marks = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, ref_norm, hyp_norm, counts FROM results WHERE key IN ({marks})", chunk)
+            for key, ref_norm, hyp_norm, counts in rows:
+                found[key] = (ref_norm, hyp_norm, json.loads(counts))
+            self.conn.execute(f"UPDATE results SET last_used = ? WHERE key IN ({marks})",
+                              [self.generation] + chunk)
+        self.conn.commit()
+        return found
+
+    def put_many(self, entries):
+        """
+        Store (key, ref_norm, hyp_norm, counts) entries, then evict the least
+        recently used ones beyond max_entries.
+        """
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results (key, ref_norm, hyp_norm, counts, last_used) VALUES (?, ?, ?, ?, ?)",
+            ((key, ref_norm, hyp_norm, json.dumps(counts), self.generation)
+             for key, ref_norm, hyp_norm, counts in entries))
+        self.evict()
+        self.conn.commit()
+
+    def evict(self):
+        (size,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        if self.max_entries is not None and size > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)",
+                (size - self.max_entries,))
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
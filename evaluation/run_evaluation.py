@@ -1,53 +1,25 @@
 import sys
 import os
+import io
 import json
+import glob
+import shutil
+import tempfile
+import contextlib
 import argparse
 import ast
-from tqdm import tqdm
+from utils import tqdm
 from datetime import datetime
 
 from evaluator import Evaluator
+from task_registry import FILE_INPUT_SHAPES, get_plugin, get_task_name
 from config import CONFIG
 
-TASK_MAP = {
-    "asr": "asr_wer",
-    "ser": "ser_eval",
-    "gr": "gr_eval",
-    "s2tt": "s2tt_eval",
-    "slu": "slu_eval",
-    "sd": "sd_eval",
-    "sa-asr": "sa_asr_eval"
-}
-
-TASK_ALIASES = {
-    "asr": ["asr"],
-    "ser": ["ser", "emotion_recognition"],
-    "gr": ["gr", "gender_recognition"],
-    "s2tt": ["s2tt", "translation_ec"],
-    "slu": ["slu", "stress_based_reasoning"],
-    "sd": ["sd", "speaker_diarization"],
-    "sa-asr": ["sa-asr", "sa_asr"]
-}
-
-def get_task_name(task_input):
-    """
-    Get standardized task name, supports case-insensitive and aliases
-    """
-    if not task_input:
-        return None
-    
-    task_lower = task_input.lower()
-    
-    # Direct match
-    if task_lower in TASK_MAP:
-        return TASK_MAP[task_lower]
-    
-    # Alias match
-    for canonical_name, aliases in TASK_ALIASES.items():
-        if task_lower in [alias.lower() for alias in aliases]:
-            return TASK_MAP[canonical_name]
-    
-    return None
+try:
+    # Optional fast JSON decoder, the stdlib parser is used when it is not installed
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 def format_task_result(task_name, result, num_samples=None):
     """
@@ -76,13 +48,12 @@ def format_task_result(task_name, result, num_samples=None):
         task_result["wer_percent"] = round(wer_score * 100, 2)
         task_result["cer_percent"] = round(cer_score * 100, 2)
     
-    # SER task: compute accuracy percentage
-    elif task_name == "ser_eval" and isinstance(result, (int, float)):
-        task_result["accuracy_percent"] = round(result * 100, 2)
-    
-    # GR task: compute accuracy percentage
-    elif task_name == "gr_eval" and isinstance(result, (int, float)):
-        task_result["accuracy_percent"] = round(result * 100, 2)
+    # SER / GR tasks: compute accuracy and macro F1 percentage
+    elif task_name in ("ser_eval", "gr_eval") and isinstance(result, dict):
+        if "accuracy" in result:
+            task_result["accuracy_percent"] = round(result["accuracy"] * 100, 2)
+        if "macro_f1" in result:
+            task_result["macro_f1_percent"] = round(result["macro_f1"] * 100, 2)
     
     # SLU task: compute accuracy percentage
     elif task_name == "slu_eval" and isinstance(result, (int, float)):
@@ -114,40 +85,242 @@ def format_task_result(task_name, result, num_samples=None):
     return task_result
 
 def load_gt_by_task(gt_json_path):
+    """
+    Stream the GT JSONL into compact per-task columns, e.g.
+    {"asr": {"key": [...], "target": [...]}, "slu": {"key": [...], "target": [...], "prompt": [...]}}.
+    Lines are parsed one at a time and only the fields used by the evaluation are kept.
+    """
     task_dict = {}
     with open(gt_json_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    for line in tqdm(lines, desc="Loading GT data", unit="lines"):
-        if not line.strip():
-            continue
-        item = json.loads(line)
-        task = item['task'].lower()
-        if task not in task_dict:
-            task_dict[task] = []
-        task_dict[task].append(item)
+        for line in tqdm(f, desc="Loading GT data", unit="lines"):
+            if not line.strip():
+                continue
+            item = json_loads(line)
+            task = item['task'].lower()
+            columns = task_dict.get(task)
+            if columns is None:
+                columns = {"key": [], "target": []}
+                if get_task_name(task) == "slu_eval":
+                    columns["prompt"] = []
+                task_dict[task] = columns
+            columns["key"].append(item['key'])
+            columns["target"].append(item['target'])
+            if "prompt" in columns:
+                columns["prompt"].append(item.get('prompt', ""))
     return task_dict
 
 def load_pred(pred_path):
     pred_dict = {}
     with open(pred_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    for line in tqdm(lines, desc="Loading prediction data", unit="lines"):
-        if not line.strip():
-            continue
-        parts = line.strip().split(None, 1)
-        if len(parts) == 2:
-            pred_dict[parts[0]] = parts[1]
+        for line in tqdm(f, desc="Loading prediction data", unit="lines"):
+            if not line.strip():
+                continue
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2:
+                pred_dict[parts[0]] = parts[1]
     return pred_dict
 
+def gt_fingerprint(gt_json):
+    """
+    Identity of one version of a GT file: its path, size and modification time.
+    """
+    stat = os.stat(gt_json)
+    return f"{os.path.abspath(gt_json)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def build_task_data(task, task_name, columns, pred_dict, options, tmp_dir):
+    """
+    Evaluator.run input of one GT task. Temporary files of the task live in
+    its own tmp_dir, so tasks never share file names.
+    """
+    records = [
+        (key, ref, pred_dict.get(key, ""))
+        for key, ref in zip(columns["key"], columns["target"])
+    ]
+    data = {
+        "records": records,
+        "workers": options["workers"],
+        "tmp_dir": tmp_dir
+    }
+    if options.get("gt_fingerprint"):
+        # Lets the task reuse what it prepared for the same GT references
+        data["gt_fingerprint"] = f"{options['gt_fingerprint']}:{task}"
+    if task_name == "asr_wer":
+        # Normalized ASR text is only written on request
+        data.update({
+            "export_dir": options["export_dir"],
+            "cs_alignment": options["cs_alignment"],
+            "cache": options["cache"],
+            "ref_store": options["ref_store"],
+            "batch": options.get("batch", False),
+            "print_alignment": options.get("print_alignment", False)
+        })
+    plugin = get_plugin(task_name)
+    if plugin is not None and plugin.needs_files:
+        ref_file = os.path.join(tmp_dir, f"tmp_ref_{task}.txt")
+        hyp_file = os.path.join(tmp_dir, f"tmp_hyp_{task}.txt")
+        with open(ref_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(f"{key}\t{ref}" for key, ref, _ in records) + '\n')
+        with open(hyp_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(f"{key}\t{hyp}" for key, _, hyp in records) + '\n')
+        data["ref_file"] = ref_file
+        data["hyp_file"] = hyp_file
+    if "prompt" in columns:
+        data["prompts"] = columns["prompt"]
+    return data
+
+def run_tasks(evaluator, jobs, language):
+    """
+    Evaluate the (title, task_name, data, num_samples) jobs one after another.
+    Returns the formatted result of every job, in job order.
+    """
+    outcomes = []
+    for title, task_name, data, num_samples in tqdm(jobs, desc="Processing tasks", unit="task"):
+        print(f"\n=== Evaluating Task: {title} ===")
+        result = evaluator.run(task_name, data, language)
+        outcomes.append(format_task_result(task_name, result, num_samples=num_samples))
+    return outcomes
+
+def limit_memory(memory_mb):
+    """
+    Cap the address space of the current process to memory_mb MiB (Unix only).
+    """
+    try:
+        import resource
+    except ImportError:
+        print("[Warning] resource module unavailable, task memory limit ignored.")
+        return
+    limit = memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+_worker_evaluator = None
+
+def _init_task_worker(evaluator_args, memory_mb):
+    global _worker_evaluator
+    if memory_mb:
+        limit_memory(memory_mb)
+    _worker_evaluator = Evaluator(CONFIG, **evaluator_args)
+
+def _run_task_job(task_name, data, language):
+    # The task output is captured and printed by the parent in task order
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            result = _worker_evaluator.run(task_name, data, language)
+    except Exception as e:
+        return None, log.getvalue(), f"{type(e).__name__}: {e}"
+    return result, log.getvalue(), None
+
+def run_tasks_parallel(jobs, language, evaluator_args, max_jobs, memory_mb=None):
+    """
+    Evaluate the jobs concurrently, one task per pool process, each process
+    limited to memory_mb MiB. Output and results are assembled in job order;
+    a task that fails is reported and its result is None.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=max(1, min(max_jobs, len(jobs))), initializer=_init_task_worker,
+                             initargs=(evaluator_args, memory_mb)) as pool:
+        futures = [pool.submit(_run_task_job, task_name, data, language) for _, task_name, data, _ in jobs]
+        for (title, task_name, _, num_samples), future in zip(jobs, futures):
+            try:
+                result, log, error = future.result()
+            except Exception as e:
+                result, log, error = None, "", f"{type(e).__name__}: {e}"
+            print(f"\n=== Evaluating Task: {title} ===")
+            print(log, end="")
+            if error:
+                print(f"[Warning] Task {title} failed: {error}")
+                outcomes.append(None)
+                continue
+            outcomes.append(format_task_result(task_name, result, num_samples=num_samples))
+    return outcomes
+
+def expand_predictions(patterns):
+    """
+    Prediction files named on the command line; glob patterns are expanded
+    in sorted order and duplicates are dropped.
+    """
+    pred_files = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                print(f"[Warning] No prediction file matches {pattern}.")
+            pred_files.extend(matches)
+        else:
+            pred_files.append(pattern)
+    return list(dict.fromkeys(pred_files))
+
+# Metric each task is ranked by in a leaderboard, and whether higher is better.
+# The first metric present in a task result is used.
+LEADERBOARD_METRICS = {
+    "asr_wer": [("mer_percent", False), ("wer_percent", False)],
+    "ser_eval": [("accuracy_percent", True)],
+    "gr_eval": [("accuracy_percent", True)],
+    "slu_eval": [("accuracy_percent", True)],
+    "s2tt_eval": [("bleu_score", True)],
+    "sd_eval": [("der_percent", False)],
+    "sa_asr_eval": [("cpwer_percent", False)]
+}
+
+def build_leaderboard(entries):
+    """
+    {task_name: [{"prediction", "metric", "value"}, ...]} ranked best first,
+    from the (pred_file, {task_name: task_result}) entries of a batch run.
+    """
+    leaderboard = {}
+    for pred_file, tasks in entries:
+        for task_name, task_result in tasks.items():
+            for metric, _ in LEADERBOARD_METRICS.get(task_name, []):
+                if metric in task_result:
+                    leaderboard.setdefault(task_name, []).append(
+                        {"prediction": pred_file, "metric": metric, "value": task_result[metric]})
+                    break
+    for task_name, ranking in leaderboard.items():
+        higher_is_better = dict(LEADERBOARD_METRICS[task_name])[ranking[0]["metric"]]
+        ranking.sort(key=lambda row: row["value"], reverse=higher_is_better)
+    return leaderboard
+
+def print_leaderboard(leaderboard):
+    for task_name, ranking in leaderboard.items():
+        print(f"\n=== Leaderboard: {task_name} ({ranking[0]['metric']}) ===")
+        for rank, row in enumerate(ranking, 1):
+            print(f"{rank:>3}. {row['value']:>8.2f}  {row['prediction']}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run evaluation tasks")
     parser.add_argument("gt_json", help="Ground truth JSON file")
-    parser.add_argument("pred_txt", help="Prediction TXT file")
+    parser.add_argument("pred_txt", nargs="+",
+                        help="Prediction TXT file(s) or glob patterns; several files are scored against the GT in one run and ranked in a leaderboard")
     parser.add_argument("--language", default="en", help="Normalization language (default: en)")
     parser.add_argument("--ser_mapping", type=str, help="SER mapping dict, e.g. '{\"neu\":0,\"hap\":1,\"ang\":2,\"sad\":3}'")
     parser.add_argument("--gr_mapping", type=str, help="GR mapping dict, e.g. '{\"man\":0,\"woman\":1}'")
+    parser.add_argument("--label_synonyms", nargs="+", default=None,
+                        help="Synonym file(s) of SER/GR labels, one 'synonym | label' line each (default: built-in synonyms only)")
     parser.add_argument("--task", type=str, default="", help="Task name (sd or sa-asr for special format)")
     parser.add_argument("--collar", type=float, default=0.5, help="Collar value for SA-ASR evaluation (default: 0.5)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used for ASR WER scoring (default: 1)")
+    parser.add_argument("--export_dir", type=str, default=None, help="Optional directory to write the normalized ASR ref/hyp text to")
+    parser.add_argument("--cs_alignment", choices=["single", "separate"], default="single",
+                        help="Code-switch scoring: one alignment split into zh/en, or three separate alignments (default: single)")
+    parser.add_argument("--align", choices=["counts", "batch"], default="counts",
+                        help="ASR alignment engine: one utterance at a time, or vectorized batches (default: counts)")
+    parser.add_argument("--print_alignment", action="store_true",
+                        help="Run the full ASR alignment and print the aligned lab/rec tokens of every utterance (monolingual ASR)")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="Optional SQLite file caching per-utterance ASR results across runs (default: no cache)")
+    parser.add_argument("--cache_size", type=int, default=1000000,
+                        help="Maximum number of utterances kept in the cache, least recently used are evicted (default: 1000000)")
+    parser.add_argument("--clear_cache", action="store_true", help="Drop every cached result before evaluating")
+    parser.add_argument("--ref_store", type=str, default=None,
+                        help="Directory of normalized ASR references, built on first use; 'auto' puts it next to the GT file (default: none)")
+    parser.add_argument("--jobs", type=int, default=1, help="Tasks evaluated concurrently, one process each (default: 1)")
+    parser.add_argument("--task_memory_mb", type=int, default=None,
+                        help="Optional address-space limit in MiB for each task process; runs tasks in a process pool")
     parser.add_argument("--saved", type=lambda x: x.lower() in ('true', '1', 'yes'), default=True, help="Save results to file (default: true)")
     parser.add_argument("--save_dir", type=str, default="results", help="Directory to save results (default: results)")
 
@@ -161,6 +334,19 @@ if __name__ == "__main__":
     collar = args.collar
     saved = args.saved
     save_dir = args.save_dir
+    workers = args.workers
+    export_dir = args.export_dir
+    cs_alignment = args.cs_alignment
+    ref_store = args.ref_store
+    if ref_store == "auto":
+        from reference_store import sidecar_path
+        ref_store = sidecar_path(gt_json, language)
+    cache = None
+    if args.cache:
+        from result_cache import ResultCache
+        cache = ResultCache(args.cache, max_entries=args.cache_size)
+        if args.clear_cache:
+            cache.clear()
     if args.ser_mapping:
         try:
             ser_mapping = ast.literal_eval(args.ser_mapping)
@@ -176,83 +362,124 @@ if __name__ == "__main__":
             print("[Warning] gr_mapping parse failed, using default.")
             gr_mapping = None
 
-    evaluator = Evaluator(CONFIG, language=language, ser_mapping=ser_mapping, gr_mapping=gr_mapping)
-    
-    # Collect all results
-    all_results = {
-        "evaluation_time": datetime.now().isoformat(),
-        "ground_truth": gt_json,
-        "prediction": pred_txt,
-        "language": language,
-        "tasks": {}
-    }
+    label_synonyms = None
+    if args.label_synonyms:
+        from label_normalizer import load_synonyms
+        label_synonyms = load_synonyms(args.label_synonyms)
 
-    if task in ["sd", "sa-asr", "sd_eval", "sa_asr_eval"]:
-        task_name = get_task_name(task)
-        if not task_name:
-            print(f"[Warning] Unknown task type: {task}, skip.")
-            sys.exit(1)
-        print(f"\n=== Evaluating Task: {task.upper()} (special input format) ===")
-        data = {
-            "ref_file": gt_json,
-            "hyp_file": pred_txt,
-            "collar": collar
-        }
-        result = evaluator.run(task_name, data, language)
-        task_result = format_task_result(task_name, result)
-        all_results["tasks"][task_name] = task_result
-    else:
-        task_dict = load_gt_by_task(gt_json)
-        pred_dict = load_pred(pred_txt)
-        for task, items in tqdm(task_dict.items(), desc="Processing tasks", unit="task"):
-            task_name = get_task_name(task)
-            if not task_name:
-                print(f"[Warning] Unknown task type: {task}, skip.")
-                continue
-            print(f"\n=== Evaluating Task: {task.upper()} ===")
-            ref_lines = []
-            hyp_lines = []
-            for item in tqdm(items, desc=f"Processing {task.upper()} items", unit="item", leave=False):
-                key = item['key']
-                ref = item['target']
-                hyp = pred_dict.get(key, "")
-                ref_lines.append(f"{key}\t{ref}")
-                hyp_lines.append(f"{key}\t{hyp}")
-            ref_file = f"tmp_ref_{task}.txt"
-            hyp_file = f"tmp_hyp_{task}.txt"
-            with open(ref_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(ref_lines) + '\n')
-            with open(hyp_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(hyp_lines) + '\n')
+    pred_files = expand_predictions(pred_txt)
+    if not pred_files:
+        print("[Error] No prediction file to evaluate.")
+        sys.exit(1)
+    batch = len(pred_files) > 1
+
+    evaluator = Evaluator(CONFIG, language=language, ser_mapping=ser_mapping, gr_mapping=gr_mapping,
+                          label_synonyms=label_synonyms)
+    # One (pred_file, {task_name: task_result}) entry per prediction
+    entries = []
+
+    # Tasks whose input is a whole RTTM/STM file rather than GT JSONL columns
+    special = get_plugin(get_task_name(task) or task)
+    if special is not None and special.input_shape in FILE_INPUT_SHAPES:
+        task_name = special.name
+        for pred_file in pred_files:
+            print(f"\n=== Evaluating Task: {task.upper()} (special input format){f' [{pred_file}]' if batch else ''} ===")
             data = {
-                "ref_file": ref_file,
-                "hyp_file": hyp_file,
-                "case_sensitive": False,
-                "tochar": False,
-                "verbose": 1
+                "ref_file": gt_json,
+                "hyp_file": pred_file,
+                "collar": collar
             }
-            if task == "slu":
-                data["prompt_jsonl"] = gt_json
             result = evaluator.run(task_name, data, language)
-            task_result = format_task_result(task_name, result, num_samples=len(items))
-            all_results["tasks"][task_name] = task_result
-            os.remove(ref_file)
-            os.remove(hyp_file)
+            entries.append((pred_file, {task_name: format_task_result(task_name, result)}))
+    else:
+        task_dict = load_gt_by_task(gt_json)
+        batch_dir = tempfile.mkdtemp(prefix="eval_batch_") if batch else None
+        asr_columns = task_dict.get("asr")
+        if batch and asr_columns is not None and language != "cs" and cache is None:
+            # Normalize the ASR references once for every prediction
+            ref_store = ref_store or os.path.join(batch_dir, "refstore")
+            records = [(key, ref, "") for key, ref in zip(asr_columns["key"], asr_columns["target"])]
+            evaluator.prepare_asr_references(ref_store, records, language)
+        options = {
+            "workers": workers,
+            "export_dir": export_dir,
+            "cs_alignment": cs_alignment,
+            "cache": cache,
+            "ref_store": ref_store,
+            "batch": args.align == "batch",
+            "print_alignment": args.print_alignment,
+            "gt_fingerprint": gt_fingerprint(gt_json)
+        }
+        jobs = []
+        job_preds = []
+        for pred_file in pred_files:
+            pred_dict = load_pred(pred_file)
+            if batch and export_dir:
+                options["export_dir"] = os.path.join(export_dir, os.path.splitext(os.path.basename(pred_file))[0])
+            for task, columns in task_dict.items():
+                task_name = get_task_name(task)
+                if not task_name:
+                    print(f"[Warning] Unknown task type: {task}, skip.")
+                    continue
+                tmp_dir = tempfile.mkdtemp(prefix=f"eval_{task}_")
+                data = build_task_data(task, task_name, columns, pred_dict, options, tmp_dir)
+                title = f"{task.upper()} [{pred_file}]" if batch else task.upper()
+                jobs.append((title, task_name, data, len(columns["key"])))
+                job_preds.append(pred_file)
+        try:
+            if args.jobs > 1 or args.task_memory_mb:
+                evaluator_args = {"language": language, "ser_mapping": ser_mapping, "gr_mapping": gr_mapping,
+                                  "label_synonyms": label_synonyms}
+                outcomes = run_tasks_parallel(jobs, language, evaluator_args, args.jobs, args.task_memory_mb)
+            else:
+                outcomes = run_tasks(evaluator, jobs, language)
+            results_by_pred = {pred_file: {} for pred_file in pred_files}
+            for pred_file, (_, task_name, _, _), task_result in zip(job_preds, jobs, outcomes):
+                if task_result is not None:
+                    results_by_pred[pred_file][task_name] = task_result
+            entries = list(results_by_pred.items())
+        finally:
+            for _, _, data, _ in jobs:
+                shutil.rmtree(data["tmp_dir"], ignore_errors=True)
+            if batch_dir:
+                shutil.rmtree(batch_dir, ignore_errors=True)
     
+    if cache is not None:
+        cache.close()
+
+    gt_basename = os.path.splitext(os.path.basename(gt_json))[0]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if batch:
+        leaderboard = build_leaderboard(entries)
+        print_leaderboard(leaderboard)
+        all_results = {
+            "evaluation_time": datetime.now().isoformat(),
+            "ground_truth": gt_json,
+            "language": language,
+            "predictions": [{"prediction": pred_file, "tasks": tasks} for pred_file, tasks in entries],
+            "leaderboard": leaderboard
+        }
+        result_filename = f"{gt_basename}_leaderboard_{timestamp}.json"
+    else:
+        # Collect all results
+        all_results = {
+            "evaluation_time": datetime.now().isoformat(),
+            "ground_truth": gt_json,
+            "prediction": pred_files[0],
+            "language": language,
+            "tasks": entries[0][1] if entries else {}
+        }
+        pred_basename = os.path.splitext(os.path.basename(pred_files[0]))[0]
+        result_filename = f"{gt_basename}_{pred_basename}_{timestamp}.json"
+
     # Save results
     if saved:
         # Create save directory
         os.makedirs(save_dir, exist_ok=True)
-        
-        # Generate filename
-        gt_basename = os.path.splitext(os.path.basename(gt_json))[0]
-        pred_basename = os.path.splitext(os.path.basename(pred_txt))[0]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        result_filename = f"{gt_basename}_{pred_basename}_{timestamp}.json"
         result_path = os.path.join(save_dir, result_filename)
         
         # Save results to JSON file
         with open(result_path, 'w', encoding='utf-8') as f:
             json.dump(all_results, f, ensure_ascii=False, indent=2)
         
-        print(f"\n[INFO] Results saved to: {result_path}")
\ No newline at end of file
+        print(f"\n[INFO] Results saved to: {result_path}")
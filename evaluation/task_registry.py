@@ -0,0 +1,122 @@
+import importlib
+
+# Input shapes a task can declare:
+# - paired_text: (key, reference text, hypothesis text) records
+# - labels: (key, reference label, hypothesis label) records
+# - rttm / stm: whole reference and hypothesis files (--task sd / sa-asr)
+INPUT_SHAPES = ("paired_text", "labels", "rttm", "stm")
+# Shapes read from the files given on the command line instead of GT JSONL columns
+FILE_INPUT_SHAPES = ("rttm", "stm")
+
+# Modules that register the built-in tasks, with every spelling their tasks
+# are looked up by (plugin name, GT task field and aliases). A module is
+# imported on the first lookup of one of its tasks, so a run only loads the
+# tasks it evaluates.
+PLUGIN_MODULES = {
+    "tasks.asr": ("asr_wer", "asr"),
+    "tasks.labels": ("ser_eval", "ser", "emotion_recognition", "gr_eval", "gr", "gender_recognition"),
+    "tasks.s2tt": ("s2tt_eval", "s2tt", "translation_ec"),
+    "tasks.slu": ("slu_eval", "slu", "stress_based_reasoning"),
+    "tasks.diarization": ("sd_eval", "sd", "speaker_diarization", "sa_asr_eval", "sa-asr", "sa_asr")
+}
+TASK_MODULES = {spelling: module for module, spellings in PLUGIN_MODULES.items() for spelling in spellings}
+
+TASK_PLUGINS = {}
+# {GT task field: plugin name} and {GT task field: accepted spellings} of the registered plugins
+TASK_MAP = {}
+TASK_ALIASES = {}
+
+
+class TaskContext:
+    """
+    What one run of a task sees: the Evaluator (normalizers, label mappings,
+    reference stores), the task data built by run_evaluation and the language.
+    """
+    def __init__(self, evaluator, data, language="en"):
+        self.evaluator = evaluator
+        self.data = data
+        self.language = language
+
+
+class TaskPlugin:
+    """
+    One evaluation task, run by run_task in three stages:
+
+    - prepare(ctx): read and normalize the task input into a batch
+    - score_batch(batch, ctx): score the batch
+    - reduce(batch, scores, ctx): turn the scores into the task result and
+      print the report
+
+    name is the task name Evaluator.run is called with, task the GT task
+    field it is registered under and aliases the other accepted spellings.
+    needs_files asks run_evaluation for "key\\ttext" ref/hyp files in addition
+    to the in-memory records.
+    """
+    name = None
+    task = None
+    aliases = ()
+    input_shape = "paired_text"
+    needs_files = False
+
+    def prepare(self, ctx):
+        raise NotImplementedError
+
+    def score_batch(self, batch, ctx):
+        raise NotImplementedError
+
+    def reduce(self, batch, scores, ctx):
+        raise NotImplementedError
+
+
+def register_task(cls):
+    """
+    Class decorator adding a TaskPlugin subclass to the registry.
+    """
+    if cls.input_shape not in INPUT_SHAPES:
+        raise ValueError(f"Unknown input shape of task {cls.name}: {cls.input_shape}")
+    if cls.name in TASK_PLUGINS:
+        raise ValueError(f"Task {cls.name} is already registered")
+    TASK_PLUGINS[cls.name] = cls()
+    TASK_MAP[cls.task] = cls.name
+    TASK_ALIASES[cls.task] = [cls.task, *cls.aliases]
+    return cls
+
+
+def _load_task_module(spelling):
+    module = TASK_MODULES.get(spelling)
+    if module is not None:
+        importlib.import_module(module)
+
+
+def get_plugin(task_name):
+    if task_name not in TASK_PLUGINS:
+        _load_task_module(task_name)
+    return TASK_PLUGINS.get(task_name)
+
+
+def get_task_name(task_input):
+    """
+    Get standardized task name, supports case-insensitive and aliases
+    """
+    if not task_input:
+        return None
+
+    task_lower = task_input.lower()
+    _load_task_module(task_lower)
+
+    # Direct match
+    if task_lower in TASK_MAP:
+        return TASK_MAP[task_lower]
+
+    # Alias match
+    for canonical_name, aliases in TASK_ALIASES.items():
+        if task_lower in [alias.lower() for alias in aliases]:
+            return TASK_MAP[canonical_name]
+
+    return None
+
+
+def run_task(plugin, ctx):
+    batch = plugin.prepare(ctx)
+    return plugin.reduce(batch, plugin.score_batch(batch, ctx), ctx)
+
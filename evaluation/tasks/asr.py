@@ -0,0 +1,326 @@
+import re
+from clean_marks import strip_punct_text, strip_unicode_punct
+from task_registry import TaskPlugin, register_task
+from utils import tqdm, keyed_pairs, export_pairs
+# The normalizer and the ASR scorer (numpy) are imported once an ASR task runs
+
+def _is_chinese_char(ch):
+    return '\u4e00' <= ch <= '\u9fff'
+
+def calc_rate(result_dict):
+    n = result_dict['all']
+    s = result_dict['sub']
+    d = result_dict['del']
+    i = result_dict['ins']
+    if n == 0:
+        return 0.0
+    return (s + d + i) / n
+
+def split_tokens(tokens):
+    zh = [t for t in tokens if all(_is_chinese_char(c) for c in t)]
+    en = [t for t in tokens if not any(_is_chinese_char(c) for c in t)]
+    return zh, en
+
+# Atoms of a code-switch line: Chinese runs and runs of other characters
+# (both with inner whitespace), numbers (with sign, decimals, separators and
+# percent), and the whitespace between them.
+RE_CS_ATOM = re.compile(
+    r'(?P<zh>[\u4e00-\u9fff](?:[\u4e00-\u9fff\s]*[\u4e00-\u9fff])?)'
+    r'|(?P<num>-?\d+(?:[.,:/]\d+)*%?)'
+    r'|(?P<space>\s+)'
+    r'|(?P<other>(?:(?!-\d)[^\u4e00-\u9fff\d\s])+(?:\s+(?:(?!-\d)[^\u4e00-\u9fff\d\s])+)*)'
+)
+RE_CS_ZH_RUN = re.compile(r'([\u4e00-\u9fff]+)')
+# Tokens of a normalized span: one token per Chinese character, otherwise
+# runs of alphanumerics. Hyphens and apostrophes split words, as in the
+# monolingual path ("state-of-the-art" -> STATE OF THE ART).
+RE_CS_TOKEN = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]+")
+
+def _number_lang(atoms, idx):
+    """
+    Language a number is read in: that of the word it counts, i.e. the next
+    zh/en atom ("3年", "3 years"), else the previous one ("今年是2023").
+    Numbers with no zh/en text around them are read as English.
+    """
+    for j in list(range(idx + 1, len(atoms))) + list(range(idx - 1, -1, -1)):
+        if atoms[j][0] in ('zh', 'en'):
+            return atoms[j][0]
+    return 'en'
+
+def codeswitch_spans(text):
+    """
+    Split a line into maximal (lang, text) spans, lang being 'zh' or 'en'.
+    Numbers join the span of the language they are attached to, whitespace
+    and punctuation join the span they sit in.
+    """
+    atoms = []
+    for m in RE_CS_ATOM.finditer(text):
+        kind = m.lastgroup
+        if kind == 'other':
+            kind = 'en' if any(ch.isalnum() for ch in m.group()) else 'sep'
+        atoms.append((kind, m.group()))
+    spans = []
+    for idx, (kind, chunk) in enumerate(atoms):
+        if kind == 'num':
+            lang = _number_lang(atoms, idx)
+        elif kind in ('space', 'sep'):
+            lang = spans[-1][0] if spans else 'en'
+        else:
+            lang = kind
+        if spans and spans[-1][0] == lang:
+            spans[-1][1].append(chunk)
+        else:
+            spans.append((lang, [chunk]))
+    return [(lang, ''.join(chunks)) for lang, chunks in spans]
+
+def _normalize_zh_span(span, proc):
+    """
+    Normalize the numbers and symbols of a zh span in one call each. Chinese
+    characters are kept as they are, so digit-by-digit readings such as
+    "六七岁" are not rewritten to "六十七岁".
+    """
+    pieces = RE_CS_ZH_RUN.split(span)
+    for idx in range(0, len(pieces), 2):
+        if pieces[idx].strip():
+            pieces[idx] = proc.normalize(pieces[idx])
+    return ''.join(pieces)
+
+def tokenize_codeswitch(text, proc1, proc2):
+    """
+    Normalize each zh/en span of a code-switch line once, with the English
+    (proc1) or Chinese (proc2) preprocessor, then tokenize: one token per
+    Chinese character, upper-cased words otherwise.
+    """
+    text = strip_unicode_punct(text, keep_number_marks=True)
+    tokens = []
+    for lang, span in codeswitch_spans(text):
+        span = _normalize_zh_span(span, proc2) if lang == 'zh' else proc1.normalize(span)
+        tokens.extend(token.upper() for token in RE_CS_TOKEN.findall(span))
+    return tokens
+
+def cs_scores(mer_result, cer_result, wer_result):
+    mer_score = calc_rate(mer_result)
+    cer_score = calc_rate(cer_result)
+    wer_score = calc_rate(wer_result)
+
+    print(f"MER: {mer_score * 100:.2f}%")
+    print(f"Chinese CER: {cer_score * 100:.2f}%")
+    print(f"English WER: {wer_score * 100:.2f}%")
+
+    return mer_score, wer_score, cer_score
+
+def _matched(refs, hyps):
+    # References without a hypothesis are skipped, the last hypothesis of a repeated key wins
+    hyp_texts = dict(hyps)
+    return [(key, ref, hyp_texts[key]) for key, ref in refs if key in hyp_texts]
+
+
+class AsrBatch:
+    """
+    Prepared ASR input. fids are the scored utterances in output order and
+    pending the (idx, ref, hyp) units of fids[idx] left to score: normalized
+    text, or token ids of vocab when vocab is set. kind picks the scorer:
+    "wer", "cs" (one alignment of the mixed tokens split by script) or
+    "cs_separate" (mixed, zh and en tokens aligned separately).
+    """
+    def __init__(self, kind, fids, pending, vocab=None, tochar=False):
+        self.kind = kind
+        self.fids = fids
+        self.pending = pending
+        self.vocab = vocab
+        self.tochar = tochar
+        self.results = [None] * len(fids)
+        # Cached runs: the ResultCache, the cache key of every fid and the
+        # (ref_norm, hyp_norm, counts) entries found in the cache
+        self.cache = None
+        self.cache_keys = None
+        self.entries = None
+
+
+@register_task
+class AsrTask(TaskPlugin):
+    name = "asr_wer"
+    task = "asr"
+    input_shape = "paired_text"
+
+    def _normalize(self, ctx, text, procs):
+        if ctx.language == "cs":
+            return ' '.join(tokenize_codeswitch(text, *procs))
+        return strip_punct_text(ctx.evaluator.preprocessor.normalize(text))
+
+    def prepare(self, ctx):
+        data = ctx.data
+        if data.get("print_alignment") and ctx.language == "cs":
+            print("[Align] Aligned tokens are only printed for monolingual ASR.")
+        if data.get("cache") is not None:
+            if data.get("print_alignment") and ctx.language != "cs":
+                print("[Cache] Alignments are not cached, scoring without the cache.")
+            elif ctx.language != "cs" or data.get("cs_alignment", "single") == "single":
+                return self._prepare_cached(ctx)
+            else:
+                print("[Cache] Separate code-switch alignments are not cached, scoring without the cache.")
+        if data.get("ref_store"):
+            if ctx.language != "cs":
+                return self._prepare_stored(ctx)
+            print("[RefStore] Code-switch references are not stored, normalizing them in place.")
+        if ctx.language == "cs":
+            return self._prepare_codeswitch(ctx)
+        return self._prepare_texts(ctx)
+
+    def _prepare_texts(self, ctx):
+        refs, hyps = keyed_pairs(ctx.data)
+        ref_lines = []
+        for key, text in tqdm(refs, desc="Normalizing reference", unit="lines"):
+            ref_lines.append((key, self._normalize(ctx, text, None)))
+        hyp_lines = []
+        for key, text in tqdm(hyps, desc="Normalizing hypothesis", unit="lines"):
+            hyp_lines.append((key, self._normalize(ctx, text, None)))
+        if ctx.data.get("export_dir"):
+            export_pairs(ctx.data["export_dir"], "ref_norm.txt", ref_lines)
+            export_pairs(ctx.data["export_dir"], "hyp_norm.txt", hyp_lines)
+        pairs = _matched(ref_lines, hyp_lines)
+        return AsrBatch("wer", [key for key, _, _ in pairs],
+                        [(idx, ref, hyp) for idx, (_, ref, hyp) in enumerate(pairs)],
+                        tochar=(ctx.language == "zh"))
+
+    def _prepare_codeswitch(self, ctx):
+        refs, hyps = keyed_pairs(ctx.data)
+        procs = ctx.evaluator.codeswitch_preprocessors
+        ref_lines = []
+        for key, text in tqdm(refs, desc="Processing reference (code-switch)", unit="lines"):
+            ref_lines.append((key, self._normalize(ctx, text, procs)))
+        hyp_lines = []
+        for key, text in tqdm(hyps, desc="Processing hypothesis (code-switch)", unit="lines"):
+            hyp_lines.append((key, self._normalize(ctx, text, procs)))
+        if ctx.data.get("export_dir"):
+            export_pairs(ctx.data["export_dir"], "ref_norm.txt", ref_lines)
+            export_pairs(ctx.data["export_dir"], "hyp_norm.txt", hyp_lines)
+        alignment = ctx.data.get("cs_alignment", "single")
+        if alignment not in ("single", "separate"):
+            raise ValueError(f"Unknown code-switch alignment: {alignment}")
+        pairs = _matched(ref_lines, hyp_lines)
+        return AsrBatch("cs" if alignment == "single" else "cs_separate", [key for key, _, _ in pairs],
+                        [(idx, ref, hyp) for idx, (_, ref, hyp) in enumerate(pairs)])
+
+    def _prepare_stored(self, ctx):
+        """
+        Monolingual ASR with the references read from data["ref_store"], a
+        store path or an already opened ReferenceStore of these references;
+        only the hypotheses are normalized.
+        """
+        from tasks.asr_wer import asr_tokens
+        from wenet_compute_cer import Vocabulary
+        refs, hyps = keyed_pairs(ctx.data)
+        store = ctx.data["ref_store"]
+        if isinstance(store, str):
+            store = ctx.evaluator.reference_store(store, refs, ctx.language)
+        vocab = Vocabulary(store.vocab)
+        hyp_lines = []
+        for key, text in tqdm(hyps, desc="Normalizing hypothesis", unit="lines"):
+            hyp_lines.append((key, self._normalize(ctx, text, None)))
+        if ctx.data.get("export_dir"):
+            export_pairs(ctx.data["export_dir"], "ref_norm.txt",
+                         [(key, ' '.join(store.tokens(idx))) for idx, (key, _) in enumerate(refs)])
+            export_pairs(ctx.data["export_dir"], "hyp_norm.txt", hyp_lines)
+        tochar = (ctx.language == "zh")
+        hyp_ids = {}
+        for key, text in hyp_lines:
+            hyp_ids[key] = vocab.encode(asr_tokens(text, tochar))
+        fids = []
+        pending = []
+        for idx, (key, _) in enumerate(refs):
+            if key in hyp_ids:
+                pending.append((len(fids), store.ids(idx), hyp_ids[key]))
+                fids.append(key)
+        return AsrBatch("wer", fids, pending, vocab=vocab, tochar=tochar)
+
+    def _prepare_cached(self, ctx):
+        """
+        ASR through data["cache"] (a ResultCache): only the utterances whose
+        (ref, hyp) text is not cached yet are normalized and aligned.
+        """
+        cache = ctx.data["cache"]
+        pairs = _matched(*keyed_pairs(ctx.data))
+        scope = f"asr_wer:{ctx.language}"
+        keys = [cache.key(scope, ref, hyp) for _, ref, hyp in pairs]
+        entries = cache.get_many(keys)
+        missing = {}
+        for idx, cache_key in enumerate(keys):
+            if cache_key not in entries and cache_key not in missing:
+                missing[cache_key] = idx
+        reused = sum(cache_key in entries for cache_key in keys)
+        print(f"[Cache] {reused}/{len(pairs)} utterances reused from {cache.path}")
+
+        pending = []
+        if missing:
+            procs = ctx.evaluator.codeswitch_preprocessors if ctx.language == "cs" else None
+            for idx in tqdm(missing.values(), desc="Normalizing uncached utterances", unit="lines"):
+                _, ref, hyp = pairs[idx]
+                pending.append((idx, self._normalize(ctx, ref, procs), self._normalize(ctx, hyp, procs)))
+        batch = AsrBatch("cs" if ctx.language == "cs" else "wer", [key for key, _, _ in pairs], pending,
+                         tochar=(ctx.language == "zh"))
+        batch.cache = cache
+        batch.cache_keys = keys
+        batch.entries = entries
+        return batch
+
+    def score_batch(self, batch, ctx):
+        from tasks.asr_wer import utterance_counts, score_utterances, cs_utterance_counts
+        workers = ctx.data.get("workers", 1)
+        vectorized = ctx.data.get("batch", False)
+        pairs = [(batch.fids[idx], ref, hyp) for idx, ref, hyp in batch.pending]
+        if not pairs:
+            return []
+        if batch.kind == "cs":
+            return cs_utterance_counts(pairs, workers=workers)
+        if batch.kind == "cs_separate":
+            zh_pairs = []
+            en_pairs = []
+            for fid, ref, hyp in pairs:
+                ref_zh, ref_en = split_tokens(ref.split())
+                hyp_zh, hyp_en = split_tokens(hyp.split())
+                zh_pairs.append((fid, ' '.join(ref_zh), ' '.join(hyp_zh)))
+                en_pairs.append((fid, ' '.join(ref_en), ' '.join(hyp_en)))
+            mixed = utterance_counts(pairs, workers=workers, batch=vectorized)
+            zh = utterance_counts(zh_pairs, tochar=True, workers=workers, batch=vectorized)
+            en = utterance_counts(en_pairs, workers=workers, batch=vectorized)
+            return [{"mixed": m, "zh": z, "en": e} for m, z, e in zip(mixed, zh, en)]
+        # The full alignment is only run when its tokens are printed
+        mode = "align" if ctx.data.get("print_alignment") else "counts"
+        if batch.vocab is not None:
+            return score_utterances(pairs, batch.vocab, workers, vectorized, mode)
+        return utterance_counts(pairs, tochar=batch.tochar, workers=workers, batch=vectorized, mode=mode)
+
+    def reduce(self, batch, counts, ctx):
+        from tasks.asr_wer import report_counts, report_cs_counts
+        if batch.cache is not None:
+            entries = batch.entries
+            new_entries = [(batch.cache_keys[idx], ref, hyp, result)
+                           for (idx, ref, hyp), result in zip(batch.pending, counts)]
+            if new_entries:
+                batch.cache.put_many(new_entries)
+            for cache_key, ref_norm, hyp_norm, result in new_entries:
+                entries[cache_key] = (ref_norm, hyp_norm, result)
+            rows = [entries[cache_key] for cache_key in batch.cache_keys]
+            batch.results = [row[2] for row in rows]
+            if ctx.data.get("export_dir"):
+                export_pairs(ctx.data["export_dir"], "ref_norm.txt", [(fid, row[0]) for fid, row in zip(batch.fids, rows)])
+                export_pairs(ctx.data["export_dir"], "hyp_norm.txt", [(fid, row[1]) for fid, row in zip(batch.fids, rows)])
+        else:
+            for (idx, _, _), result in zip(batch.pending, counts):
+                batch.results[idx] = result
+
+        if batch.kind == "wer":
+            return report_counts(batch.fids, batch.results, verbose=2 if ctx.data.get("print_alignment") else 1)
+        if batch.kind == "cs":
+            if batch.cache is None:
+                print("Computing MER, Chinese CER and English WER from one alignment...")
+            overall = report_cs_counts(batch.fids, batch.results)
+            return cs_scores(overall["mixed"], overall["zh"], overall["en"])
+        overall = {}
+        for part, title in (("mixed", "Computing MER for code-switching ASR..."),
+                            ("zh", "Computing CER for Chinese part..."),
+                            ("en", "Computing WER for English part...")):
+            print(title)
+            overall[part] = report_counts(batch.fids, [result[part] for result in batch.results])
+        return cs_scores(overall["mixed"], overall["zh"], overall["en"])
@@ -1,48 +1,290 @@
 import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from wenet_compute_cer import Calculator, characterize, normalize
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from wenet_compute_cer import Calculator, Vocabulary, characterize, normalize, edit_counts, edit_ops, width, \
+    OP_COR, OP_SUB, OP_DEL, OP_INS
 
-def compute_wer(ref_file, hyp_file, ignore_words=None, case_sensitive=False, tochar=False, split=None, verbose=1):
-    calculator = Calculator()
-    rec_set = {}
+def _print_utt(fid, result):
+    if result['all'] != 0:
+        wer = float(result['ins'] + result['sub'] + result['del']) * 100.0 / result['all']
+    else:
+        wer = 0.0
+    print(f'utt: {fid}')
+    print(f'WER: {wer:.2f} % N={result["all"]} C={result["cor"]} S={result["sub"]} D={result["del"]} I={result["ins"]}')
 
-    with open(hyp_file, 'r', encoding='utf-8') as fh:
-        for line in fh:
-            if tochar:
-                array = characterize(line)
-            else:
-                array = line.strip().split()
-            if len(array) == 0: continue
-            fid = array[0]
-            rec_set[fid] = normalize(array[1:], ignore_words or set(), case_sensitive, split)
+def _print_alignment(result):
+    lab_line = []
+    rec_line = []
+    for lab_token, rec_token in zip(result['lab'], result['rec']):
+        length = max(width(lab_token), width(rec_token))
+        lab_line.append(lab_token + ' ' * (length - width(lab_token)))
+        rec_line.append(rec_token + ' ' * (length - width(rec_token)))
+    print('lab: ' + ' '.join(lab_line))
+    print('rec: ' + ' '.join(rec_line))
 
+def _score_utts(utts, mode, vocab):
+    """
+    (results, per-token (counts, seen) arrays of the Calculator) of utts;
+    only mode="align" traces tokens, so the arrays are None otherwise.
+    """
+    calculator = Calculator(vocab)
     results = []
-    for line in open(ref_file, 'r', encoding='utf-8'):
-        if tochar:
-            array = characterize(line)
+    for _, lab, rec in utts:
+        if mode == "align":
+            results.append(calculator.calculate_ids(lab, rec))
         else:
-            array = line.rstrip('\n').split()
-        if len(array) == 0: continue
-        fid = array[0]
-        if fid not in rec_set:
-            continue
-        lab = normalize(array[1:], ignore_words or set(), case_sensitive, split)
-        rec = rec_set[fid]
-        result = calculator.calculate(lab, rec)
-        results.append(result)
+            results.append(edit_counts(lab, rec, calculator.cost))
+    return results, calculator.count_arrays() if mode == "align" else None
+
+def _score_shard(args):
+    return _score_utts(*args)
+
+def _map_sharded(fn, utts, extra, workers):
+    """
+    fn((shard, *extra)) of contiguous shards of utts, run on a process pool
+    and returned in shard order, so the output does not depend on workers.
+    """
+    import multiprocessing
+    shard_size = max(1, -(-len(utts) // (workers * 4)))
+    shards = [(utts[i:i + shard_size], *extra) for i in range(0, len(utts), shard_size)]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(fn, shards)
+
+def asr_tokens(text, tochar=False, ignore_words=None, case_sensitive=False, split=None):
+    """
+    Tokens of one normalized line as utterance_counts scores them.
+    """
+    array = characterize(text) if tochar else text.split()
+    return normalize(array, ignore_words or set(), case_sensitive, split)
+
+def utterance_counts(pairs, tochar=False, workers=1, batch=False, mode="counts", ignore_words=None,
+                     case_sensitive=False, split=None, calculator=None):
+    """
+    Error counts of every (key, ref_text, hyp_text) pair, in order; see
+    score_utterances. Nothing is printed; see report_counts.
+    """
+    vocab = calculator.vocab if calculator is not None else Vocabulary()
+
+    def tokenize(text):
+        return vocab.encode(asr_tokens(text, tochar, ignore_words, case_sensitive, split))
+
+    utts = [(fid, tokenize(ref), tokenize(hyp)) for fid, ref, hyp in pairs]
+    return score_utterances(utts, vocab, workers, batch, mode, calculator)
+
+def score_utterances(utts, vocab, workers=1, batch=False, mode="counts", calculator=None):
+    """
+    Error counts of every (key, ref_ids, hyp_ids) utterance whose token ids
+    come from vocab, in order. Nothing is printed.
+
+    mode="counts" only computes the error counts (no traceback, O(min(n, m)) memory).
+    mode="align" runs the full Calculator alignment, whose results also hold
+    the aligned 'lab'/'rec' tokens that report_counts prints at verbose > 1.
+    batch=True scores the counts with the vectorized engine in tasks.batch_wer.
+    workers > 1 shards the utterances across a process pool; every worker
+    runs its own Calculator.
+
+    With mode="align", the per-token statistics of the workers are merged
+    in shard order into calculator (a Calculator over vocab) when one is
+    given, so its data, overall() and cluster() do not depend on workers.
+    """
+    if mode not in ("counts", "align"):
+        raise ValueError(f"Unknown scoring mode: {mode}")
+    if batch and mode == "counts":
+        from tasks.batch_wer import batch_edit_counts
+        return batch_edit_counts([(lab, rec) for _, lab, rec in utts])
+    if workers > 1 and len(utts) > 1:
+        parts = _map_sharded(_score_shard, utts, (mode, vocab), workers)
+    else:
+        parts = [_score_utts(utts, mode, vocab)]
+    if calculator is not None:
+        for _, arrays in parts:
+            if arrays is not None:
+                calculator.merge_counts(*arrays)
+    return [result for results, _ in parts for result in results]
+
+def report_counts(fids, results, verbose=1):
+    """
+    Sum per-utterance counts and print them: one WER line per utterance
+    when verbose, plus its aligned tokens at verbose > 1 for results of
+    mode="align", then the overall line.
+    """
+    overall = _empty_counts()
+    for fid, result in zip(fids, results):
+        for error in overall:
+            overall[error] += result[error]
         if verbose:
-            if result['all'] != 0:
-                wer = float(result['ins'] + result['sub'] + result['del']) * 100.0 / result['all']
+            _print_utt(fid, result)
+            if verbose > 1 and 'lab' in result:
+                _print_alignment(result)
+    _print_counts("Overall", overall)
+    return overall
+
+def compute_wer(ref_file, hyp_file, ignore_words=None, case_sensitive=False, tochar=False, split=None, verbose=1,
+                batch=False, mode="counts", workers=1, calculator=None):
+    """
+    WER of "key text" ref/hyp files, printed and returned as overall counts.
+    mode, batch, workers and calculator are those of score_utterances.
+    References without a hypothesis are skipped.
+    """
+    vocab = calculator.vocab if calculator is not None else Vocabulary()
+
+    def read_utts(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                array = characterize(line) if tochar else line.split()
+                if array:
+                    yield array[0], vocab.encode(normalize(array[1:], ignore_words or set(), case_sensitive, split))
+
+    rec_set = dict(read_utts(hyp_file))
+    utts = [(fid, lab, rec_set[fid]) for fid, lab in read_utts(ref_file) if fid in rec_set]
+    return compute_wer_ids([(fid, lab) for fid, lab, _ in utts], rec_set.items(), vocab, verbose, batch, mode, workers,
+                           calculator)
+
+def compute_wer_texts(refs, hyps, ignore_words=None, case_sensitive=False, tochar=False, split=None, verbose=1,
+                      batch=False, mode="counts", workers=1, calculator=None):
+    """
+    In-memory counterpart of compute_wer: refs and hyps are iterables of
+    (key, text) pairs. The last hypothesis of a repeated key wins.
+    """
+    rec_set = dict(hyps)
+    pairs = [(fid, text, rec_set[fid]) for fid, text in refs if fid in rec_set]
+    results = utterance_counts(pairs, tochar, workers, batch, mode, ignore_words, case_sensitive, split, calculator)
+    return report_counts([fid for fid, _, _ in pairs], results, verbose)
+
+def compute_wer_ids(refs, hyps, vocab, verbose=1, batch=False, mode="counts", workers=1, calculator=None):
+    """
+    compute_wer_texts for already tokenized text: refs and hyps are (key, ids)
+    pairs whose token ids come from vocab.
+    """
+    rec_set = dict(hyps)
+    utts = [(fid, lab, rec_set[fid]) for fid, lab in refs if fid in rec_set]
+    results = score_utterances(utts, vocab, workers, batch, mode, calculator)
+    return report_counts([fid for fid, _, _ in utts], results, verbose)
+
+CS_SCRIPTS = ("zh", "en")
+
+def token_script(token):
+    """
+    'zh' for a token made only of Chinese characters, 'en' for a token without
+    any, None for a token mixing both.
+    """
+    chinese = sum('\u4e00' <= ch <= '\u9fff' for ch in token)
+    if chinese == len(token):
+        return "zh"
+    return "en" if chinese == 0 else None
+
+def _empty_counts():
+    return {'all': 0, 'cor': 0, 'sub': 0, 'ins': 0, 'del': 0}
+
+def _cs_counts(lab, rec, scripts, cost):
+    """
+    Align one code-switch utterance once and split the edit operations by
+    script. Correct words, substitutions and deletions are charged to the
+    script of the reference token, insertions to the script of the hypothesis
+    token. A substitution across scripts counts as a deletion in the reference
+    script plus an insertion in the hypothesis script. lab and rec are token
+    ids, scripts[id] is the script of that token.
+    """
+    ops = edit_ops(lab, rec, cost)
+    counts = {"mixed": _empty_counts(), "zh": _empty_counts(), "en": _empty_counts()}
+    mixed = counts["mixed"]
+    w = len(rec) + 1
+    i = len(lab)
+    j = len(rec)
+    while True:
+        op = ops[i * w + j]
+        if op == OP_COR or op == OP_SUB:
+            error = 'cor' if op == OP_COR else 'sub'
+            mixed['all'] += 1
+            mixed[error] += 1
+            lab_script = scripts[lab[i - 1]]
+            rec_script = scripts[rec[j - 1]]
+            if lab_script == rec_script or op == OP_COR:
+                if lab_script:
+                    counts[lab_script]['all'] += 1
+                    counts[lab_script][error] += 1
             else:
-                wer = 0.0
-            print(f'utt: {fid}')
-            print(f'WER: {wer:.2f} % N={result["all"]} C={result["cor"]} S={result["sub"]} D={result["del"]} I={result["ins"]}')
-    overall = calculator.overall()
-    if overall['all'] != 0:
-        wer = float(overall['ins'] + overall['sub'] + overall['del']) * 100.0 / overall['all']
+                if lab_script:
+                    counts[lab_script]['all'] += 1
+                    counts[lab_script]['del'] += 1
+                if rec_script:
+                    counts[rec_script]['ins'] += 1
+            i -= 1
+            j -= 1
+        elif op == OP_DEL:
+            mixed['all'] += 1
+            mixed['del'] += 1
+            lab_script = scripts[lab[i - 1]]
+            if lab_script:
+                counts[lab_script]['all'] += 1
+                counts[lab_script]['del'] += 1
+            i -= 1
+        elif op == OP_INS:
+            mixed['ins'] += 1
+            rec_script = scripts[rec[j - 1]]
+            if rec_script:
+                counts[rec_script]['ins'] += 1
+            j -= 1
+        else:
+            break
+    return counts
+
+def _score_cs_utts(args):
+    utts, scripts = args
+    cost = Calculator().cost
+    return [_cs_counts(lab, rec, scripts, cost) for _, lab, rec in utts]
+
+def _print_counts(name, counts):
+    if counts['all'] != 0:
+        wer = float(counts['ins'] + counts['sub'] + counts['del']) * 100.0 / counts['all']
     else:
         wer = 0.0
-    print(f'Overall -> {wer:.2f} % N={overall["all"]} C={overall["cor"]} S={overall["sub"]} D={overall["del"]} I={overall["ins"]}')
-    return overall
\ No newline at end of file
+    print(f'{name} -> {wer:.2f} % N={counts["all"]} C={counts["cor"]} S={counts["sub"]} D={counts["del"]} I={counts["ins"]}')
+
+def cs_utterance_counts(pairs, workers=1):
+    """
+    Code-switch scoring from a single alignment of the mixed token stream:
+    {'mixed', 'zh', 'en'} counts of every (key, ref_text, hyp_text) pair of
+    space separated tokens, in order. Each token is tagged as zh or en by its
+    characters; 'mixed' gives the MER and matches utterance_counts on the
+    same lines, 'zh' the CER and 'en' the WER. Nothing is printed.
+    """
+    vocab = Vocabulary()
+
+    def tokenize(text):
+        return vocab.encode(normalize(text.split(), set(), False))
+
+    utts = [(fid, tokenize(ref), tokenize(hyp)) for fid, ref, hyp in pairs]
+    scripts = [token_script(token) for token in vocab.tokens]
+
+    if workers > 1 and len(utts) > 1:
+        parts = _map_sharded(_score_cs_utts, utts, (scripts,), workers)
+        return [counts for part in parts for counts in part]
+    return _score_cs_utts((utts, scripts))
+
+def report_cs_counts(fids, results, verbose=1):
+    """
+    Sum per-utterance code-switch counts and print them: the mixed counts
+    per utterance, then the overall mixed, zh and en lines.
+    """
+    overall = {"mixed": _empty_counts(), "zh": _empty_counts(), "en": _empty_counts()}
+    for fid, counts in zip(fids, results):
+        for name, values in counts.items():
+            for error in values:
+                overall[name][error] += values[error]
+        if verbose:
+            _print_utt(fid, counts["mixed"])
+    _print_counts("Overall", overall["mixed"])
+    for script in CS_SCRIPTS:
+        _print_counts(f"Overall ({script})", overall[script])
+    return overall
+
+def compute_cs_wer_texts(refs, hyps, verbose=1, workers=1):
+    """
+    Code-switch counterpart of compute_wer_texts, see cs_utterance_counts.
+    Returns the overall {'mixed', 'zh', 'en'} counts.
+    """
+    rec_set = dict(hyps)
+    pairs = [(fid, text, rec_set[fid]) for fid, text in refs if fid in rec_set]
+    return report_cs_counts([fid for fid, _, _ in pairs], cs_utterance_counts(pairs, workers), verbose)
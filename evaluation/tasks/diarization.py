@@ -0,0 +1,111 @@
+import os
+from task_registry import TaskPlugin, register_task
+from utils import tqdm
+
+
+def _print_der(result_der):
+    """
+    Print the DER of every session and return (sum of the DERs, number of sessions).
+    """
+    total_der = 0
+    num_sessions = 0
+    for session, der in result_der.items():
+        print(f"DER for {session}: {float(der.error_rate):.4f} "
+            f"(missed: {float(der.missed_speaker_time):.4f}, "
+            f"fa: {float(der.falarm_speaker_time):.4f}, "
+            f"ser: {float(der.speaker_error_time):.4f})")
+        total_der += float(der.error_rate)
+        num_sessions += 1
+    return total_der, num_sessions
+
+def _normalize_stm(in_stm, out_stm, language, desc):
+    from text_normalizer import normalize_text
+    with open(in_stm, 'r', encoding='utf-8') as fin:
+        lines = fin.readlines()
+    with open(out_stm, 'w', encoding='utf-8') as fout:
+        for line in tqdm(lines, desc=desc, unit="lines"):
+            parts = line.strip().split(maxsplit=5)
+            if len(parts) == 6:
+                norm_trans = normalize_text(parts[5], case_sensitive=False, remove_tag=True, language=language)
+                parts[5] = norm_trans
+                parts[3] = str(float(parts[3]))
+                parts[4] = str(float(parts[4]))
+                fout.write(' '.join(parts) + '\n')
+
+
+@register_task
+class SdTask(TaskPlugin):
+    name = "sd_eval"
+    task = "sd"
+    aliases = ("speaker_diarization",)
+    input_shape = "rttm"
+
+    def prepare(self, ctx):
+        import meeteval
+        collar = ctx.data.get("collar", 0.25)
+        print(f"[SD] Running DER evaluation with collar={collar}s")
+        return meeteval.io.load(ctx.data["ref_file"]), meeteval.io.load(ctx.data["hyp_file"]), collar
+
+    def score_batch(self, batch, ctx):
+        import meeteval
+        ref, hyp, collar = batch
+        return meeteval.der.dscore(ref, hyp, collar=collar)
+
+    def reduce(self, batch, result_der, ctx):
+        total_der, total_sessions = _print_der(result_der)
+
+        avg_der = total_der / total_sessions if total_sessions > 0 else 0
+        print(f"[SD] Average DER: {avg_der:.4f}")
+
+        return {
+            "der": avg_der,
+            "num_sessions": total_sessions
+        }
+
+
+@register_task
+class SaAsrTask(TaskPlugin):
+    name = "sa_asr_eval"
+    task = "sa-asr"
+    aliases = ("sa_asr",)
+    input_shape = "stm"
+
+    def prepare(self, ctx):
+        import meeteval
+        tmp_dir = ctx.data.get("tmp_dir", ".")
+        ref_norm_stm = os.path.join(tmp_dir, "tmp_ref_sa_asr_norm.stm")
+        hyp_norm_stm = os.path.join(tmp_dir, "tmp_hyp_sa_asr_norm.stm")
+        _normalize_stm(ctx.data["ref_file"], ref_norm_stm, ctx.language, "Normalizing reference (SA-ASR)")
+        _normalize_stm(ctx.data["hyp_file"], hyp_norm_stm, ctx.language, "Normalizing hypothesis (SA-ASR)")
+        ref = meeteval.io.load(ref_norm_stm)
+        hyp = meeteval.io.load(hyp_norm_stm)
+        os.remove(ref_norm_stm)
+        os.remove(hyp_norm_stm)
+        return ref, hyp, ctx.data.get("collar", 0.5)
+
+    def score_batch(self, batch, ctx):
+        import meeteval
+        ref, hyp, collar = batch
+        return meeteval.wer.cpwer(ref, hyp), meeteval.der.dscore(ref, hyp, collar=collar)
+
+    def reduce(self, batch, scores, ctx):
+        import meeteval
+        result_cpwer, result_der = scores
+        collar = batch[2]
+        print(f"\n[SA-ASR] Evaluation Results (collar={collar}s):")
+        print("=" * 60)
+
+        avg_cpwer = meeteval.wer.combine_error_rates(list(result_cpwer.values()))
+        print(f"cpWER: {avg_cpwer.error_rate:.4f} (errors: {avg_cpwer.errors}, length: {avg_cpwer.length})")
+
+        total_der, num_sessions = _print_der(result_der)
+
+        avg_der = total_der / num_sessions if num_sessions > 0 else 0
+
+        print("=" * 60)
+
+        return {
+            "cpwer": float(avg_cpwer.error_rate),
+            "der": avg_der,
+            "num_sessions": num_sessions
+        }
@@ -0,0 +1,117 @@
+from task_registry import TaskPlugin, register_task
+from utils import tqdm, keyed_pairs
+# numpy is imported once a label task runs
+
+
+class LabelTask(TaskPlugin):
+    """
+    Classification of predicted labels. References and predictions are
+    joined by key, normalized by the Evaluator LabelNormalizer named by
+    normalizer and scored with one confusion matrix, from which the accuracy
+    and the per-class precision/recall/F1 are read.
+
+    Class ids are the normalizer classes, then the other labels of the run in
+    order of appearance; these extra classes are local to the run.
+    """
+    input_shape = "labels"
+    label = None
+    normalizer = None
+
+    def prepare(self, ctx):
+        import numpy as np
+
+        refs, hyps = keyed_pairs(ctx.data)
+        labels = getattr(ctx.evaluator, self.normalizer)
+        classes = list(labels.classes)
+        class_ids = {label: idx for idx, label in enumerate(classes)}
+
+        def class_id(label):
+            idx = class_ids.get(label)
+            if idx is None:
+                idx = class_ids[label] = len(classes)
+                classes.append(label)
+            return idx
+
+        hyp_ids = {}
+        for key, text in tqdm(hyps, desc=f"Processing hypothesis ({self.label})", unit="lines"):
+            label = labels.prediction_label(text)
+            hyp_ids[key] = -1 if label is None else class_id(label)
+        ref_column = []
+        hyp_column = []
+        for key, text in tqdm(refs, desc=f"Processing reference ({self.label})", unit="lines"):
+            # References without a usable prediction are not scored
+            if hyp_ids.get(key, -1) < 0:
+                continue
+            ref_column.append(class_id(labels.reference_label(text)))
+            hyp_column.append(hyp_ids[key])
+        return classes, np.array(ref_column, dtype=np.int64), np.array(hyp_column, dtype=np.int64)
+
+    def score_batch(self, batch, ctx):
+        import numpy as np
+
+        classes, ref_ids, hyp_ids = batch
+        n = len(classes)
+        return np.bincount(ref_ids * n + hyp_ids, minlength=n * n).reshape(n, n)
+
+    def reduce(self, batch, confusion, ctx):
+        import numpy as np
+
+        total = int(confusion.sum())
+        if not total:
+            print(f"[{self.label}] No valid labels for accuracy calculation.")
+            return None
+        # Only the classes present in the references or the predictions are reported
+        support = confusion.sum(axis=1)
+        predicted = confusion.sum(axis=0)
+        active = np.flatnonzero(support + predicted)
+        confusion = confusion[np.ix_(active, active)]
+        support = support[active]
+        predicted = predicted[active]
+        tp = np.diag(confusion)
+        precision = np.divide(tp, predicted, out=np.zeros(len(tp)), where=predicted > 0)
+        recall = np.divide(tp, support, out=np.zeros(len(tp)), where=support > 0)
+        f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(len(tp)),
+                       where=(precision + recall) > 0)
+        labels = [batch[0][idx] for idx in active]
+        correct = int(tp.sum())
+        acc = correct / total
+        print(f"[{self.label}] Accuracy: {acc:.4f} ({correct}/{total})")
+        per_class = {}
+        for idx, label in enumerate(labels):
+            per_class[label] = {
+                "precision": float(precision[idx]),
+                "recall": float(recall[idx]),
+                "f1": float(f1[idx]),
+                "support": int(support[idx])
+            }
+            print(f"[{self.label}] {label}: P={precision[idx]:.4f} R={recall[idx]:.4f} "
+                  f"F1={f1[idx]:.4f} (support: {int(support[idx])})")
+        macro_f1 = float(f1.mean())
+        print(f"[{self.label}] Macro F1: {macro_f1:.4f}")
+        return {
+            "accuracy": acc,
+            "correct": correct,
+            "total": total,
+            "macro_f1": macro_f1,
+            "per_class": per_class,
+            "labels": labels,
+            "confusion_matrix": confusion.tolist()
+        }
+
+
+@register_task
+class SerTask(LabelTask):
+    name = "ser_eval"
+    task = "ser"
+    aliases = ("emotion_recognition",)
+    label = "SER"
+    normalizer = "ser_labels"
+
+
+@register_task
+class GrTask(LabelTask):
+    name = "gr_eval"
+    task = "gr"
+    aliases = ("gender_recognition",)
+    label = "GR"
+    normalizer = "gr_labels"
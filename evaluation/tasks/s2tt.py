@@ -0,0 +1,82 @@
+from task_registry import TaskPlugin, register_task
+from utils import keyed_pairs
+# sacrebleu is imported once an S2TT task runs
+
+
+def bleu_tokenizer(language):
+    language = language.lower()
+    if language in ["zh", "ch", "chinese"]:
+        return 'zh'
+    if language in ["en", "english"]:
+        return '13a'
+    return 'none'
+
+
+class S2ttScorer:
+    """
+    BLEU and chrF2 of hypothesis lists against one list of references. The
+    references are tokenized and their n-gram statistics cached once, by
+    sacrebleu's reference cache, so every hypothesis list scored afterwards
+    only tokenizes the hypotheses. Corpus and per-sentence scores are both
+    computed from the per-sentence sufficient statistics; sentence BLEU uses
+    the effective n-gram order.
+    """
+    def __init__(self, refs, tokenize):
+        from sacrebleu.metrics import BLEU, CHRF
+        self.tokenize = tokenize
+        self.bleu = BLEU(tokenize=tokenize, references=[refs])
+        self.chrf = CHRF(word_order=2, references=[refs])
+        # Only used to compute sentence scores from statistics, holds no references
+        self.sentence_bleu = BLEU(tokenize=tokenize, effective_order=True)
+
+    def score(self, hyps):
+        """
+        (corpus BLEU score, corpus chrF score, [(sentence BLEU, sentence chrF)])
+        of hyps, aligned with the references.
+        """
+        bleu_stats = self.bleu._extract_corpus_statistics(hyps, None)
+        chrf_stats = self.chrf._extract_corpus_statistics(hyps, None)
+        sentences = [
+            (self.sentence_bleu._compute_score_from_stats(bleu).score,
+             self.chrf._compute_score_from_stats(chrf).score)
+            for bleu, chrf in zip(bleu_stats, chrf_stats)
+        ]
+        return self.bleu._aggregate_and_compute(bleu_stats), self.chrf._aggregate_and_compute(chrf_stats), sentences
+
+
+@register_task
+class S2ttTask(TaskPlugin):
+    """
+    Corpus and per-utterance BLEU/chrF2. Predictions are joined to the
+    references by key, a missing prediction scores as an empty line.
+    """
+    name = "s2tt_eval"
+    task = "s2tt"
+    aliases = ("translation_ec",)
+    input_shape = "paired_text"
+
+    def prepare(self, ctx):
+        refs, hyps = keyed_pairs(ctx.data)
+        hyp_texts = dict(hyps)
+        return [key for key, _ in refs], [text for _, text in refs], [hyp_texts.get(key, "") for key, _ in refs]
+
+    def score_batch(self, batch, ctx):
+        keys, ref_lines, hyp_lines = batch
+        if not keys:
+            return None
+        scorer = ctx.evaluator.s2tt_scorer(ref_lines, bleu_tokenizer(ctx.language), ctx.data.get("gt_fingerprint"))
+        return scorer.score(hyp_lines)
+
+    def reduce(self, batch, scores, ctx):
+        if scores is None:
+            print("[S2TT] No valid pairs for BLEU calculation.")
+            return None
+        score_bleu, score_chrf, sentences = scores
+        print(f"[S2TT] BLEU = {score_bleu.score:.2f}")
+        print(f"[S2TT] chrF2 = {score_chrf.score:.2f}")
+        return {
+            "bleu": score_bleu.score,
+            "chrf": score_chrf.score,
+            "sentences": [{"key": key, "bleu": bleu, "chrf": chrf}
+                          for key, (bleu, chrf) in zip(batch[0], sentences)]
+        }
@@ -0,0 +1,84 @@
+import sys
+import os
+from task_registry import TaskPlugin, register_task
+from utils import read_keyed_pairs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from process_prediction import option_index, load_option_index, restore_answer
+
+
+def prompt_options(keys, prompts):
+    """
+    {key: option index} of the SLU prompts; each distinct prompt is parsed once.
+    """
+    parsed = {}
+    options = {}
+    for key, prompt in zip(keys, prompts):
+        index = parsed.get(prompt)
+        if index is None:
+            index = parsed[prompt] = option_index(prompt)
+        options[key] = index
+    return options
+
+def restore_answers(pairs, options):
+    """
+    {key: answer} of (key, text) answers, restored by process_prediction.py:
+    the texts of a key are joined and restored to the text of the option
+    they name. Answers are lower-cased and empty ones dropped.
+    """
+    full = {}
+    for key, text in pairs:
+        full[key] = full.get(key, "") + " " + text.strip()
+    answers = {}
+    for key, full_pred in full.items():
+        answer = restore_answer(full_pred, options.get(key)).strip().lower()
+        if answer:
+            answers[key] = answer
+    return answers
+
+
+@register_task
+class SluTask(TaskPlugin):
+    """
+    Multiple-choice accuracy: reference and predicted answers are restored to
+    option texts with the options of the GT prompts, then compared.
+    """
+    name = "slu_eval"
+    task = "slu"
+    aliases = ("stress_based_reasoning",)
+    input_shape = "paired_text"
+
+    def prepare(self, ctx):
+        data = ctx.data
+        if "records" in data:
+            records = data["records"]
+            keys = [key for key, _, _ in records]
+            options = prompt_options(keys, data.get("prompts") or [""] * len(keys))
+            refs = [(key, ref) for key, ref, _ in records]
+            hyps = [(key, hyp) for key, _, hyp in records]
+        else:
+            # ref/hyp files with the prompts of the GT JSONL at data["prompt_jsonl"]
+            options = load_option_index(data["prompt_jsonl"])
+            refs = read_keyed_pairs(data["ref_file"])
+            hyps = read_keyed_pairs(data["hyp_file"])
+        return restore_answers(refs, options), restore_answers(hyps, options)
+
+    def score_batch(self, batch, ctx):
+        ref_answers, hyp_answers = batch
+        total = 0
+        correct = 0
+        for key in ref_answers:
+            if key in hyp_answers:
+                total += 1
+                if ref_answers[key] == hyp_answers[key]:
+                    correct += 1
+        return correct, total
+
+    def reduce(self, batch, scores, ctx):
+        correct, total = scores
+        if total == 0:
+            print("[SLU] No valid pairs for accuracy calculation.")
+            return None
+        acc = correct / total
+        print(f"[SLU] Accuracy: {acc:.4f} ({correct}/{total})")
+        return acc
@@ -1,3 +1,52 @@
+import os
+
 def load_data(path):
     with open(path, 'r', encoding='utf-8') as f:
-        return [line.strip() for line in f]
\ No newline at end of file
+        return [line.strip() for line in f]
+
+def tqdm(iterable=None, **kwargs):
+    """
+    tqdm progress bar; the tqdm package is only imported once a bar is shown.
+    """
+    from tqdm import tqdm as _tqdm
+    return _tqdm(iterable, **kwargs)
+
+def split_keyed_line(line):
+    """
+    (key, text) of a "key\ttext" line, None when the line has no text.
+    """
+    parts = line.strip().split('\t', 1)
+    return parts if len(parts) == 2 else None
+
+def read_keyed_pairs(path):
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = split_keyed_line(line)
+            if parts:
+                pairs.append((parts[0], parts[1]))
+    return pairs
+
+def keyed_pairs(data):
+    """
+    Reference and hypothesis (key, text) pairs of a task, either from the
+    in-memory data["records"] of (key, ref, hyp) or from the ref/hyp files.
+    Entries with an empty text are dropped, as they are when read from a file.
+    """
+    if "records" not in data:
+        return read_keyed_pairs(data["ref_file"]), read_keyed_pairs(data["hyp_file"])
+    refs = []
+    hyps = []
+    for key, ref, hyp in data["records"]:
+        parts = split_keyed_line(f"{key}\t{ref}")
+        if parts:
+            refs.append((parts[0], parts[1]))
+        parts = split_keyed_line(f"{key}\t{hyp}")
+        if parts:
+            hyps.append((parts[0], parts[1]))
+    return refs, hyps
+
+def export_pairs(export_dir, filename, pairs):
+    os.makedirs(export_dir, exist_ok=True)
+    with open(os.path.join(export_dir, filename), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(f"{key}\t{text}" for key, text in pairs) + '\n')
@@ -2,14 +2,39 @@ import sys,os
 import importlib
 import re
 from .logger import logger
-from .lang_en import TextNormalization_EN
-from .lang_zh import TextNormalization_ZH
 
-
-LANG_CLASSES = {
-    'en': TextNormalization_EN(),
-    'zh': TextNormalization_ZH(),
+# 语言 -> (模块, 类名)。归一化类在第一次使用时才导入并实例化，
+# 只用asr_simple_tn的调用方（如evaluation/preprocess.py）导入本包时不再编译两套语言规则
+LANG_CLASS_PATHS = {
+    'en': ('.lang_en', 'TextNormalization_EN'),
+    'zh': ('.lang_zh', 'TextNormalization_ZH'),
 }
+_normalizers = {}
+
+
+def _lang_class(language):
+    module_name, class_name = LANG_CLASS_PATHS[language]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+def get_normalizer(language):
+    """
+    每种语言一个共享的归一化实例，第一次请求时创建
+    """
+    normalizer = _normalizers.get(language)
+    if normalizer is None:
+        normalizer = _normalizers[language] = _lang_class(language)()
+    return normalizer
+
+
+def __getattr__(name):
+    # 兼容旧接口：LANG_CLASSES、TextNormalization_EN/ZH 按需加载
+    if name == 'LANG_CLASSES':
+        return {language: get_normalizer(language) for language in LANG_CLASS_PATHS}
+    for language, (_, class_name) in LANG_CLASS_PATHS.items():
+        if name == class_name:
+            return _lang_class(language)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def text_normalization(
     input_file: str,
@@ -32,10 +57,10 @@ def text_normalization(
     keep_empty_lines = kwargs.get("keep_empty_lines")
     debug = kwargs.get("debug")
 
-    if language not in LANG_CLASSES:
+    if language not in LANG_CLASS_PATHS:
         raise ValueError(f"Not supported language: {language}")
 
-    normalizer = LANG_CLASSES[language]
+    normalizer = get_normalizer(language)
 
     if debug > 0: 
         print(kwargs, file=sys.stderr)
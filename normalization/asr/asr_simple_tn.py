@@ -58,9 +58,49 @@ def get_n2w_map(map_file, language=None):
     #print(n2w_map, file=sys.stderr)
     return n2w_map
 
+def load_and_sort_map(map_file, language=None):
+    """读取映射文件，返回按key长度降序排列的(key, value)列表"""
+    n2w_map = get_n2w_map(map_file, language)
+    if not n2w_map:
+        return []
+    pairs = []
+    for item in n2w_map:
+        for k, v in item.items():
+            pairs.append((k, v))
+    pairs.sort(key=lambda x: len(x[0]), reverse=True)
+    return pairs
+
+def load_num2words_maps(map_dir, language):
+    """
+    一次性加载asr_num2words所需的映射，结果与asr_num2words未传入排序映射时的fallback完全一致：
+    - other: map_dir下除digit.map之外的所有.map
+    - digit: 优先map_dir/<language>/digit.map，其次map_dir/digit.map
+    返回编译好的 (other_map_sorted, digit_map_sorted)，均为TnRules
+    """
+    if 'tts' in language:
+        language = re.sub(r'_tts$', '', language)
+
+    other_map_sorted = []
+    for mf in glob.glob(os.path.join(map_dir, "*.map")):
+        if os.path.basename(mf) != "digit.map":
+            other_map_sorted.extend(load_and_sort_map(mf, language))
+    other_map_sorted.sort(key=lambda x: len(x[0]), reverse=True)
+    other_map_sorted = TnRules(other_map_sorted)
+
+    lang_map_file = os.path.join(map_dir, language, "digit.map")
+    root_map_file = os.path.join(map_dir, "digit.map")
+    if os.path.exists(lang_map_file):
+        digit_map_sorted = load_and_sort_map(lang_map_file, language)
+    elif os.path.exists(root_map_file):
+        digit_map_sorted = load_and_sort_map(root_map_file, language)
+    else:
+        digit_map_sorted = []
+    digit_map_sorted = TnRules(digit_map_sorted, literal=True)
+    return other_map_sorted, digit_map_sorted
+
 def tn_replace(text, key, value):
     pattern = None
-    if key[0:2] == "\\b" or key[-2:] == "\\b": # 目前仅支持在首尾加单词边界符
+    if is_regex_key(key):
         pattern = r'{}'.format(key)
         #print(f"key = {key}", file=sys.stderr)
         #print(f"pattern = {pattern}", file=sys.stderr)
@@ -71,143 +111,219 @@ def tn_replace(text, key, value):
         text = text.replace(key, value)
     return text
 
+def is_regex_key(key):
+    return key[0:2] == "\\b" or key[-2:] == "\\b" # 目前仅支持在首尾加单词边界符
+
+class TnRules:
+    """
+    编译后的映射规则：预编译按key长度降序排列的(key, value)列表。
+    所有key合成一个交替正则作为快速过滤，文本中没有任何key命中时直接返回；
+    有命中时仍按原顺序逐条替换(后面的规则会作用在前面规则的输出上)，
+    只跳过当前文本中不会命中的规则，结果与逐条调用tn_replace完全一致。
+    以\\b开头或结尾的key按正则处理，其余key按字面量处理(literal=True时全部按字面量)。
+    可以像原来的列表一样迭代和取长度。
+    """
+    def __init__(self, pairs, literal=False):
+        self.pairs = list(pairs)
+        self.rules = []
+        alternatives = []
+        for key, value in self.pairs:
+            if not literal and is_regex_key(key):
+                rule = re.compile(key)
+                alternatives.append(f"(?:{key})")
+            else:
+                rule = None
+                alternatives.append(re.escape(key))
+            self.rules.append((key, rule, value))
+        self.pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def __iter__(self):
+        return iter(self.pairs)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def apply(self, text):
+        if self.pattern is None or not self.pattern.search(text):
+            return text
+        for key, rule, value in self.rules:
+            if rule is not None:
+                text = rule.sub(value, text)
+            elif key in text:
+                text = text.replace(key, value)
+        return text
+
+def apply_tn_rules(text, rules, literal=False):
+    """用TnRules一次扫描完成替换；普通(key, value)列表则逐条替换(兼容老接口)"""
+    if isinstance(rules, TnRules):
+        return rules.apply(text)
+    for key, value in rules:
+        if literal:
+            text = text.replace(key, value)
+        else:
+            text = tn_replace(text, key, value)
+    return text
+
+ZH_DIGIT_MAP = {'零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
+                '五': '5', '六': '6', '七': '7', '八': '8', '九': '9'}
+ZH_UNIT_MAP = {
+    'kg': '千克', 'km': '千米', 'cm': '厘米', 'mm': '毫米',
+    'ml': '毫升', 'l': '升', 'm': '米'
+}
+
+# 中文数字的逐位读法（如"一零"、"一五"、"二零"等），只匹配2位中文数字，避免匹配更长或更短的
+RE_ZH_TWO_DIGITS = re.compile(r'([一二三四五六七八九零])([一二三四五六七八九零])')
+# 独立的1~2位数字（避免匹配日期中的数字）
+RE_ZH_SMALL_NUM = re.compile(r'(?<!\d)(\d{1,2})(?!\d)')
+RE_ZH_CELSIUS = re.compile(r'°\s*C')
+RE_ZH_SQUARE_METER = re.compile(r'(\d+(?:\.\d+)?)\s*m2(?![a-zA-Z0-9])')
+RE_ZH_CUBIC_METER = re.compile(r'(\d+(?:\.\d+)?)\s*m3(?![a-zA-Z0-9])')
+RE_ZH_DATE = re.compile(r'(\d{4})\s*[-/]\s*(\d{1,2})\s*[-/]\s*(\d{1,2})')
+RE_ZH_FRACTION = re.compile(r'(?<!\d[/-])(\d+)\s*/\s*(\d+)(?![/-]\d)')
+RE_ZH_PERCENT = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+RE_ZH_NEGATIVE = re.compile(r'(?<![0-9a-zA-Z])\s*-\s*(\d+)')
+RE_ZH_UNIT = re.compile(r'(\d+(?:\.\d+)?)\s*(kg|km|cm|mm|ml|l|m)(?![a-zA-Z])')
+RE_DIGIT = re.compile(r'\d')
+
+def _normalize_chinese_digits(match):
+    digit_str = match.group(0)
+    # 将中文数字转换为阿拉伯数字，再转回规范的中文数字
+    try:
+        arabic_num = ''.join([ZH_DIGIT_MAP.get(ch, ch) for ch in digit_str])
+        num = int(arabic_num)
+        if 10 <= num <= 99:
+            return num2words_std(num, lang='zh_CN')
+        else:
+            return digit_str
+    except:
+        return digit_str
+
+def _arabic_to_chinese_num(match):
+    num_str = match.group(0)
+    try:
+        num = int(num_str)
+        # 对于小于100的数字，转换为中文数字
+        if num < 100:
+            return num2words_std(num, lang='zh_CN')
+        else:
+            return num_str  # 大数字保持阿拉伯数字
+    except:
+        return num_str
+
+def _replace_zh_unit(match):
+    val = match.group(1)
+    unit = match.group(2)
+    return val + ZH_UNIT_MAP.get(unit, unit)
+
 def preprocess_zh_text(text):
     # 0. 归一化不规范的中文数字表达（如"一零"→"十"，"一五"→"十五"）
     # 这处理的是逐位读法，如10读作"一零"，15读作"一五"
-    def normalize_chinese_digits(match):
-        digit_str = match.group(0)
-        # 将中文数字转换为阿拉伯数字，再转回规范的中文数字
-        digit_map = {'零': '0', '一': '1', '二': '2', '三': '3', '四': '4', 
-                   '五': '5', '六': '6', '七': '7', '八': '8', '九': '9'}
-        try:
-            arabic_num = ''.join([digit_map.get(ch, ch) for ch in digit_str])
-            num = int(arabic_num)
-            if 10 <= num <= 99:
-                return num2words_std(num, lang='zh_CN')
-            else:
-                return digit_str
-        except:
-            return digit_str
-    
-    # 匹配中文数字的逐位读法（如"一零"、"一五"、"二零"等）
-    # 只匹配2位中文数字，避免匹配更长或更短的
-    text = re.sub(r'([一二三四五六七八九零])([一二三四五六七八九零])', normalize_chinese_digits, text)
-    
+    text = RE_ZH_TWO_DIGITS.sub(_normalize_chinese_digits, text)
+
+    # 2. Decomposed Units (NFKC artifacts): ℃ -> °C
+    text = RE_ZH_CELSIUS.sub('摄氏度', text)
+
+    # 以下步骤都只作用于阿拉伯数字，不含数字的行(大多数)直接返回
+    if not RE_DIGIT.search(text):
+        return text
+
     # 1. 阿拉伯数字转中文数字（处理时间、年龄等场景）
-    def arabic_to_chinese_num(match):
-        num_str = match.group(0)
-        try:
-            num = int(num_str)
-            # 对于小于100的数字，转换为中文数字
-            if num < 100:
-                return num2words_std(num, lang='zh_CN')
-            else:
-                return num_str  # 大数字保持阿拉伯数字
-        except:
-            return num_str
-    
-    # 匹配独立的数字（避免匹配日期中的数字）
-    text = re.sub(r'(?<!\d)(\d{1,2})(?!\d)', arabic_to_chinese_num, text)
-    
-    # 2. Decomposed Units (NFKC artifacts): ℃ -> °C, ㎡ -> m2
-    text = re.sub(r'°\s*C', '摄氏度', text)
-    text = re.sub(r'(\d+(?:\.\d+)?)\s*m2(?![a-zA-Z0-9])', r'\1平方米', text)
-    text = re.sub(r'(\d+(?:\.\d+)?)\s*m3(?![a-zA-Z0-9])', r'\1立方米', text)
+    text = RE_ZH_SMALL_NUM.sub(_arabic_to_chinese_num, text)
+
+    # 2. Decomposed Units (NFKC artifacts): ㎡ -> m2
+    text = RE_ZH_SQUARE_METER.sub(r'\1平方米', text)
+    text = RE_ZH_CUBIC_METER.sub(r'\1立方米', text)
 
     # 3. Dates: 2023-10-27 or 2023/10/27 -> 2023年10月27日
-    text = re.sub(r'(\d{4})\s*[-/]\s*(\d{1,2})\s*[-/]\s*(\d{1,2})', r'\1年\2月\3日', text)
-    
+    text = RE_ZH_DATE.sub(r'\1年\2月\3日', text)
+
     # 4. Fractions: 1/2 -> 2分之1
     # Lookbehind/ahead to avoid matching parts of dates or other patterns if necessary
     # Assuming simple 1/2 format for fractions in ASR output
-    text = re.sub(r'(?<!\d[/-])(\d+)\s*/\s*(\d+)(?![/-]\d)', r'\2分之\1', text)
-    
+    text = RE_ZH_FRACTION.sub(r'\2分之\1', text)
+
     # 5. Percent: 50% -> 百分之50
-    text = re.sub(r'(\d+(?:\.\d+)?)\s*%', r'百分之\1', text)
-    
+    text = RE_ZH_PERCENT.sub(r'百分之\1', text)
+
     # 6. Negative: -5 -> 负5
     # Avoid matching ranges like 5-10 (digit-digit) or models iPhone-15 (letter-digit)
     # But allow "在-5" (Chinese-digit)
-    text = re.sub(r'(?<![0-9a-zA-Z])\s*-\s*(\d+)', r'负\1', text)
-    
+    text = RE_ZH_NEGATIVE.sub(r'负\1', text)
+
     # 7. Units (Attached): 3m, 75kg
-    unit_map = {
-        'kg': '千克', 'km': '千米', 'cm': '厘米', 'mm': '毫米',
-        'ml': '毫升', 'l': '升', 'm': '米'
-    }
-    def replace_unit(match):
-        val = match.group(1)
-        unit = match.group(2)
-        return val + unit_map.get(unit, unit)
-        
-    text = re.sub(r'(\d+(?:\.\d+)?)\s*(kg|km|cm|mm|ml|l|m)(?![a-zA-Z])', replace_unit, text)
-    
+    text = RE_ZH_UNIT.sub(_replace_zh_unit, text)
+
     return text
 
+RE_EN_FEET = re.compile(r'(\d+)\'')
+RE_EN_ORDINAL = re.compile(r'\b(\d+)(st|nd|rd|th)\b', flags=re.IGNORECASE)
+RE_EN_CURRENCY = re.compile(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)')
+RE_EN_DECADE = re.compile(r'\b(\d{4})s\b')
+RE_EN_PHONE_LONG = re.compile(r'\b\d{3}-\d{3}-\d{4}\b')
+RE_EN_PHONE_SHORT = re.compile(r'\b\d{3}-\d{4}\b')
+RE_EN_NEGATIVE = re.compile(r'(?<![\d\w])-\s*(\d+(?:\.\d+)?)')
+
+def _replace_ordinal(match):
+    num = match.group(1)
+    # Check if the suffix matches the number (heuristic)
+    # 1 -> st, 2 -> nd, 3 -> rd, others -> th (except 11, 12, 13)
+    # But here we just trust the text and convert
+    return num2words_std(num, lang='en', to='ordinal')
+
+def _replace_currency(match):
+    val = match.group(1).replace(',', '')
+    try:
+        return num2words_std(val, lang='en', to='currency', currency='USD')
+    except:
+        return match.group(0) # Fallback
+
+def _replace_decade(match):
+    year = match.group(1)
+    # Convert 1990 -> nineteen ninety
+    # Then pluralize last word
+    text_year = num2words_std(year, lang='en', to='year')
+    if text_year.endswith('y'):
+        return text_year[:-1] + 'ies'
+    else:
+        return text_year + 's'
+
+def _replace_phone(match):
+    # Read digit by digit
+    # 555-0199 -> five five five zero one nine nine
+    digits = match.group(0)
+    digits_clean = digits.replace('-', ' ')
+    res = []
+    for char in digits_clean:
+        if char.isdigit():
+            res.append(num2words_std(char, lang='en'))
+        else:
+            res.append(char)
+    return ' '.join(res)
+
 def preprocess_en_text(text):
     # 0. Special Symbols: ' (feet)
     # Must be handled before or carefully to not conflict with quotes (though ' is usually single quote)
     # Only replace ' if preceded by digit
-    text = re.sub(r'(\d+)\'', r'\1 feet', text)
+    text = RE_EN_FEET.sub(r'\1 feet', text)
 
     # 1. Ordinals: 1st, 2nd, 3rd, 4th -> first, second, third, fourth
-    def replace_ordinal(match):
-        num = match.group(1)
-        # Check if the suffix matches the number (heuristic)
-        # 1 -> st, 2 -> nd, 3 -> rd, others -> th (except 11, 12, 13)
-        # But here we just trust the text and convert
-        return num2words_std(num, lang='en', to='ordinal')
-    
-    text = re.sub(r'\b(\d+)(st|nd|rd|th)\b', replace_ordinal, text, flags=re.IGNORECASE)
+    text = RE_EN_ORDINAL.sub(_replace_ordinal, text)
 
     # 2. Currency: $12.50, $190
-    def replace_currency(match):
-        val = match.group(1).replace(',', '')
-        try:
-            return num2words_std(val, lang='en', to='currency', currency='USD')
-        except:
-            return match.group(0) # Fallback
-
-    text = re.sub(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?)', replace_currency, text)
+    text = RE_EN_CURRENCY.sub(_replace_currency, text)
 
     # 3. Decades: 1990s -> nineteen nineties
-    def replace_decade(match):
-        year = match.group(1)
-        # Convert 1990 -> nineteen ninety
-        # Then pluralize last word
-        text_year = num2words_std(year, lang='en', to='year')
-        if text_year.endswith('y'):
-            return text_year[:-1] + 'ies'
-        else:
-            return text_year + 's'
-            
-    text = re.sub(r'\b(\d{4})s\b', replace_decade, text)
+    text = RE_EN_DECADE.sub(_replace_decade, text)
 
     # 4. Phone Numbers: 555-0199 or 123-456-7890
-    # Read digit by digit
-    def replace_phone(match):
-        digits = match.group(0)
-        # Replace hyphens with spaces? Or silence?
-        # Read digits.
-        # 555-0199 -> five five five zero one nine nine
-        # Clean text
-        digits_clean = digits.replace('-', ' ')
-        res = []
-        for char in digits_clean:
-            if char.isdigit():
-                res.append(num2words_std(char, lang='en'))
-            else:
-                res.append(char)
-        return ' '.join(res)
-
     # Pattern: 3 digits - 4 digits (and optional area code)
-    text = re.sub(r'\b\d{3}-\d{3}-\d{4}\b', replace_phone, text)
-    text = re.sub(r'\b\d{3}-\d{4}\b', replace_phone, text)
+    text = RE_EN_PHONE_LONG.sub(_replace_phone, text)
+    text = RE_EN_PHONE_SHORT.sub(_replace_phone, text)
 
     # 5. Negative numbers: -5 -> minus five
     # Avoid matching ranges or phone numbers (already handled but be careful)
     # Lookbehind for start of line or space
-    text = re.sub(r'(?<![\d\w])-\s*(\d+(?:\.\d+)?)', r'minus \1', text)
+    text = RE_EN_NEGATIVE.sub(r'minus \1', text)
 
     return text
 
@@ -245,52 +361,27 @@ def asr_num2words(
     
 
     # 1. 先用 other 类映射替换 text
-    if other_map_sorted is not None:
-        pairs = other_map_sorted
-    else:
-        # fallback: 兼容老接口
-        pairs = []
-        map_files = glob.glob(os.path.join(map_dir, "*.map"))
-        for mf in map_files:
-            if os.path.basename(mf) != "digit.map":
-                pairs.extend(load_and_sort_map(mf))
-        pairs.sort(key=lambda x: len(x[0]), reverse=True)
-    text2 = text
-    for key, value in pairs:
-        text2 = tn_replace(text2, key, value)
+    # 2. digit.map
+    if other_map_sorted is None or digit_map_sorted is None:
+        # fallback: 兼容老接口，每次调用都会重新扫描并解析map_dir
+        fallback_other, fallback_digit = load_num2words_maps(map_dir, language)
+        if other_map_sorted is None:
+            other_map_sorted = fallback_other
+        if digit_map_sorted is None:
+            digit_map_sorted = fallback_digit
+    text2 = apply_tn_rules(text, other_map_sorted)
     if debug and text != text2:
         logger.debug(f"map_i: {text}")
         logger.debug(f"map_o: {text2}")
     text = text2
-
-    # 2. digit.map
-    if digit_map_sorted is not None:
-        n2w_map_sorted = digit_map_sorted
-    else:
-        # fallback: 兼容老接口
-        lang_map_file = os.path.join(map_dir, language, "digit.map")
-        root_map_file = os.path.join(map_dir, "digit.map")
-        if os.path.exists(lang_map_file):
-            map_file = lang_map_file
-        elif os.path.exists(root_map_file):
-            map_file = root_map_file
-        else:
-            map_file = None
-
-        n2w_map = get_n2w_map(map_file, language) if map_file else []
-        n2w_map_sorted = []
-        if n2w_map:
-            for item in n2w_map:
-                for k, v in item.items():
-                    n2w_map_sorted.append((k, v))
-            n2w_map_sorted.sort(key=lambda x: len(x[0]), reverse=True)
+    n2w_map_sorted = digit_map_sorted
 
     # 3. 缓存
     if cached_num_map is None:
         cached_num_map = {}
 
     # 正则匹配找到所有的数字
-    matches = list(re.finditer(NUM_REGEX, text)) # 保存为列表
+    matches = list(NUM_REGEX.finditer(text)) # 保存为列表
     if False:
         print("num of matched digital strings = ", len(matches), file=sys.stderr)
     pre_pos = 0
@@ -323,8 +414,7 @@ def asr_num2words(
             elif num_raw in cached_num_map:
                 num = cached_num_map[num_raw]
             else:
-                for key, value in n2w_map_sorted:
-                    num = num.replace(key, value)
+                num = apply_tn_rules(num, n2w_map_sorted, literal=True)
                 cached_num_map[num_raw] = num
 
             if debug:
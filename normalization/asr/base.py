@@ -2,9 +2,10 @@ import codecs,os,sys,io
 import argparse
 import unicodedata
 import re
+from typing import Callable, NamedTuple, Optional
 from .logger import logger
-from .utils import replace_invisible_chars, simple_pattern_difference
-from .asr_simple_tn import asr_num2words, get_n2w_map
+from .utils import replace_invisible_chars, simple_pattern_difference, CharTable
+from .asr_simple_tn import asr_num2words, get_n2w_map, load_and_sort_map, TnRules
 
 # 原则上，将字符分成以下几类：
 # (1) 字母表字符：alphabet_pattern 该语种字符集
@@ -48,6 +49,20 @@ marks_pattern_category = {
 marks_pattern = ''.join(marks_pattern_category.values()) 
 # see: https://www.fuhaoku.net/blocks
 
+# 短横、单引号清理用到的正则，预先编译
+RE_DASHES = re.compile(r'-+')
+RE_DASHES_AFTER_SPACE_QUOTE = re.compile(r'([\s\'])[-]+')
+RE_DASHES_BEFORE_SPACE_QUOTE = re.compile(r'[-]+([\s\'])')
+RE_LEADING_DASH = re.compile(r'^-')
+RE_TRAILING_DASH = re.compile(r'-$')
+RE_SINGLE_QUOTES = re.compile(r'\'+')
+RE_QUOTES_BEFORE_SPACE_DASH = re.compile(r'\'+([\s-])')
+RE_QUOTES_AFTER_DASH = re.compile(r'([-])\'+')
+RE_QUOTES_AFTER_SPACE_DASH = re.compile(r'([\s-])\'+')
+RE_LEADING_QUOTE = re.compile(r'^\'')
+RE_TRAILING_QUOTE = re.compile(r'\'$')
+RE_SPACES = re.compile(r'[ ]+')
+
 # 以下函数需要被某些语种的Pattern定义时调用，放在类外面
 # NFKC正规化 
 def fun_normalize_nfkc(text: str, debug: int = 0):
@@ -88,6 +103,29 @@ def fun_normalize_nfkc(text: str, debug: int = 0):
 
     return text2
 
+# 全球特殊数字字符 -> 西阿拉伯数字
+SPECIAL_NUM_MAP = {
+    # 阿拉伯语数字（U+0660-U+0669）
+    '\u0660': '0', '\u0661': '1', '\u0662': '2', '\u0663': '3', '\u0664': '4', '\u0665': '5', '\u0666': '6', '\u0667': '7', '\u0668': '8', '\u0669': '9',
+    # 波斯语/乌尔都语数字（U+06F0-U+06F9）
+    '\u06F0': '0', '\u06F1': '1', '\u06F2': '2', '\u06F3': '3', '\u06F4': '4', '\u06F5': '5', '\u06F6': '6', '\u06F7': '7', '\u06F8': '8', '\u06F9': '9',
+    # 印地语/天城文数字（U+0966-U+096F）
+    '\u0966': '0', '\u0967': '1', '\u0968': '2', '\u0969': '3', '\u096A': '4', '\u096B': '5', '\u096C': '6', '\u096D': '7', '\u096E': '8', '\u096F': '9',
+    # 孟加拉语数字（U+09E6-U+09EF）
+    '\u09E6': '0', '\u09E7': '1', '\u09E8': '2', '\u09E9': '3', '\u09EA': '4', '\u09EB': '5', '\u09EC': '6', '\u09ED': '7', '\u09EE': '8', '\u09EF': '9',
+    # 泰语/老挝语数字（U+0E50-U+0E59）
+    '\u0E50': '0', '\u0E51': '1', '\u0E52': '2', '\u0E53': '3', '\u0E54': '4', '\u0E55': '5', '\u0E56': '6', '\u0E57': '7', '\u0E58': '8', '\u0E59': '9',
+    # 藏语数字（U+0F20-U+0F29）
+    '\u0F20': '0', '\u0F21': '1', '\u0F22': '2', '\u0F23': '3', '\u0F24': '4', '\u0F25': '5', '\u0F26': '6', '\u0F27': '7', '\u0F28': '8', '\u0F29': '9',
+    # 旁遮普语数字（U+0A66-U+0A6F）
+    '\u0A66': '0', '\u0A67': '1', '\u0A68': '2', '\u0A69': '3', '\u0A6A': '4', '\u0A6B': '5', '\u0A6C': '6', '\u0A6D': '7', '\u0A6E': '8', '\u0A6F': '9',
+    # 马拉雅拉姆语数字（U+0D66-U+0D6F）
+    '\u0D66': '0', '\u0D67': '1', '\u0D68': '2', '\u0D69': '3', '\u0D6A': '4', '\u0D6B': '5', '\u0D6C': '6', '\u0D6D': '7', '\u0D6E': '8', '\u0D6F': '9',
+    # 僧伽罗语数字（U+0DE6-U+0DEF）
+    '\u0DE6': '0', '\u0DE7': '1', '\u0DE8': '2', '\u0DE9': '3', '\u0DEA': '4', '\u0DEB': '5', '\u0DEC': '6', '\u0DED': '7', '\u0DEE': '8', '\u0DEF': '9'
+}
+SPECIAL_NUM_TABLE = str.maketrans(SPECIAL_NUM_MAP)
+
 def fun_convert_special_numbers_to_arabic(text: str, debug: int = 0) -> str:
     """
     将全球特殊数字字符转换为西阿拉伯数字:
@@ -98,28 +136,7 @@ def fun_convert_special_numbers_to_arabic(text: str, debug: int = 0) -> str:
     藏语    ༠ ༡ ༢ ༣ ༤ ༥ ༦ ༧ ༨ ༩ 0 1 2 3 4 5 6 7 8 9
     孟加拉语    ০ ১ ২ ৩ ৪ ৫ ৬ ৭ ৮ ৯ 0 1 2 3 4 5 6 7 8 9    
     """
-    special_num_map = {
-        # 阿拉伯语数字（U+0660-U+0669）
-        '\u0660': '0', '\u0661': '1', '\u0662': '2', '\u0663': '3', '\u0664': '4', '\u0665': '5', '\u0666': '6', '\u0667': '7', '\u0668': '8', '\u0669': '9',
-        # 波斯语/乌尔都语数字（U+06F0-U+06F9）
-        '\u06F0': '0', '\u06F1': '1', '\u06F2': '2', '\u06F3': '3', '\u06F4': '4', '\u06F5': '5', '\u06F6': '6', '\u06F7': '7', '\u06F8': '8', '\u06F9': '9',
-        # 印地语/天城文数字（U+0966-U+096F）
-        '\u0966': '0', '\u0967': '1', '\u0968': '2', '\u0969': '3', '\u096A': '4', '\u096B': '5', '\u096C': '6', '\u096D': '7', '\u096E': '8', '\u096F': '9',
-        # 孟加拉语数字（U+09E6-U+09EF）
-        '\u09E6': '0', '\u09E7': '1', '\u09E8': '2', '\u09E9': '3', '\u09EA': '4', '\u09EB': '5', '\u09EC': '6', '\u09ED': '7', '\u09EE': '8', '\u09EF': '9',
-        # 泰语/老挝语数字（U+0E50-U+0E59）
-        '\u0E50': '0', '\u0E51': '1', '\u0E52': '2', '\u0E53': '3', '\u0E54': '4', '\u0E55': '5', '\u0E56': '6', '\u0E57': '7', '\u0E58': '8', '\u0E59': '9',
-        # 藏语数字（U+0F20-U+0F29）
-        '\u0F20': '0', '\u0F21': '1', '\u0F22': '2', '\u0F23': '3', '\u0F24': '4', '\u0F25': '5', '\u0F26': '6', '\u0F27': '7', '\u0F28': '8', '\u0F29': '9',
-        # 旁遮普语数字（U+0A66-U+0A6F）
-        '\u0A66': '0', '\u0A67': '1', '\u0A68': '2', '\u0A69': '3', '\u0A6A': '4', '\u0A6B': '5', '\u0A6C': '6', '\u0A6D': '7', '\u0A6E': '8', '\u0A6F': '9',
-        # 马拉雅拉姆语数字（U+0D66-U+0D6F）
-        '\u0D66': '0', '\u0D67': '1', '\u0D68': '2', '\u0D69': '3', '\u0D6A': '4', '\u0D6B': '5', '\u0D6C': '6', '\u0D6D': '7', '\u0D6E': '8', '\u0D6F': '9',
-        # 僧伽罗语数字（U+0DE6-U+0DEF）
-        '\u0DE6': '0', '\u0DE7': '1', '\u0DE8': '2', '\u0DE9': '3', '\u0DEA': '4', '\u0DEB': '5', '\u0DEC': '6', '\u0DED': '7', '\u0DEE': '8', '\u0DEF': '9'
-    }
-
-    text2 = text.translate(str.maketrans(special_num_map))
+    text2 = text.translate(SPECIAL_NUM_TABLE)
     if debug > 0 and text != text2:
         logger.debug(f"fun_i: {text}")
         logger.debug(f"fun_o: {text2}")
@@ -128,6 +145,24 @@ def fun_convert_special_numbers_to_arabic(text: str, debug: int = 0) -> str:
 
 
 
+class LanguageProfile(NamedTuple):
+    """
+    编译好的语种配置：TextNormalization_Base.compile_profile()按语种和参数生成。
+    生成后只读，可以在多个线程之间共享使用，无需重新config。
+    """
+    re_line_contains_invalid_char: re.Pattern
+    re_line_no_letter: re.Pattern
+    re_line_no_local_letter: re.Pattern
+    re_line_four_consecutive_letters: re.Pattern
+    re_char_not_ascii_lang_mark: re.Pattern
+    re_char_diacritic: Optional[re.Pattern]
+    re_char_not_word: re.Pattern
+    re_brackets_content: re.Pattern
+    re_char_before_tn: re.Pattern
+    fun_char_before_tn: Callable
+    other_map_sorted: TnRules
+    digit_map_sorted: TnRules
+
 # 公共正则、辅助函数、基类
 class TextNormalization_Base:
     def __init__(self):
@@ -173,6 +208,7 @@ class TextNormalization_Base:
         self.cached_num_map = {}
         self.digit_map_sorted = []
         self.other_map_sorted = []
+        self.profile = None
 
     def _load_maps(self):
 
@@ -190,25 +226,14 @@ class TextNormalization_Base:
             else:
                 other_map_files.append(mf)
 
-        # 2. 读取映射并排序
-        def load_and_sort_map(map_file, language):
-            n2w_map = get_n2w_map(map_file, language)
-            if not n2w_map:
-                return []
-            pairs = []
-            for item in n2w_map:
-                for k, v in item.items():
-                    pairs.append((k, v))
-            pairs.sort(key=lambda x: len(x[0]), reverse=True)
-            return pairs
-
-        # 3. 先用 other 类映射替换 text
+        # 2. 先用 other 类映射替换 text
         self.other_map_sorted = []
         for mf in other_map_files:
             self.other_map_sorted.extend(load_and_sort_map(mf, self.language))
         self.other_map_sorted.sort(key=lambda x: len(x[0]), reverse=True)
+        self.other_map_sorted = TnRules(self.other_map_sorted)
 
-        # 4. digit.map
+        # 3. digit.map
         self.digit_map_sorted = []
         if digit_map_file:
             n2w_map = get_n2w_map(digit_map_file)
@@ -217,20 +242,20 @@ class TextNormalization_Base:
                     for k, v in item.items():
                         self.digit_map_sorted.append((k, v))
                 self.digit_map_sorted.sort(key=lambda x: len(x[0]), reverse=True)
+        self.digit_map_sorted = TnRules(self.digit_map_sorted, literal=True)
 
     def get_language():
         return [self.language, self.language_name_en, self.language_name_zh, self.spaced_writing, self.score_method]
 
     def config(self, **kwargs):
-        self.init_regex_patterns()
-
         # 遍历所有传入参数，覆盖默认值
         for key, value in kwargs.items():
             if value is not None:
                 setattr(self, key, value)
 
-        # 加载map_dir中的映射文件
-        self._load_maps()
+        # 编译好的正则等只挂在本实例上，不同语种、不同配置的实例互不影响；
+        # 整体替换profile，正在其它线程中执行的pipeline仍使用旧的profile
+        self.profile = self.compile_profile()
 
         if self.debug > 0: 
             print("所有参数：", flush=True, file=sys.stderr)
@@ -240,10 +265,9 @@ class TextNormalization_Base:
 
     def init_regex_patterns(self):
         """
-        一次性初始化所有正则表达式
+        一次性编译所有正则表达式，返回 {字段名: re.Pattern}，字段名与LanguageProfile一致
         """
-        global RE_LINE_CONTAINS_INVALID_CHAR, RE_LINE_NO_LETTER, RE_LINE_NO_LOCAL_LETTER, RE_LINE_FOUR_CONSECUTIVE_LETTERS
-        global RE_CHAR_NOT_ASCII_LANG_MARK, RE_CHAR_DIACRITIC, RE_CHAR_NOT_WORD, RE_BRACKETS_CONTENT
+        patterns = {"re_char_diacritic": None}
 
         # alphabet_pattern 应当排除 marks_pattern
         if True: # 此处可以添加暂不支持转义字符的语种
@@ -259,45 +283,92 @@ class TextNormalization_Base:
         # 1. 行包含非法字符
         pattern_a = r'[^' + self.ascii_pattern + self.alphabet_pattern + self.marks_pattern + self.diacritic_pattern + ']'
         #logger.info("RE_LINE_CONTAINS_INVALID_CHAR = " + pattern_a)
-        RE_LINE_CONTAINS_INVALID_CHAR = re.compile(pattern_a)
+        patterns["re_line_contains_invalid_char"] = re.compile(pattern_a)
 
         # 2. 行不包含字母：不含任何字母表字符、英文字符
         pattern_b = r'^[^' + self.english_letter_pattern + self.alphabet_pattern + ']*$'
         #logger.info("RE_LINE_NO_LETTER = " + pattern_b)
-        RE_LINE_NO_LETTER = re.compile(pattern_b)
+        patterns["re_line_no_letter"] = re.compile(pattern_b)
 
         # 3. 行不包含字母表字母
         pattern_c = r'^[^' + self.alphabet_pattern + ']*$'
         #logger.info("RE_LINE_NO_LOCAL_LETTER = " + pattern_c)
-        RE_LINE_NO_LOCAL_LETTER = re.compile(pattern_c)
+        patterns["re_line_no_local_letter"] = re.compile(pattern_c)
 
         # 4. 行包含4个连续相同字母
         pattern_d = r'([' + self.alphabet_pattern + '])\\1\\1\\1'
         #logger.info("RE_LINE_FOUR_CONSECUTIVE_LETTERS = " + pattern_d)
-        RE_LINE_FOUR_CONSECUTIVE_LETTERS = re.compile(pattern_d)
+        patterns["re_line_four_consecutive_letters"] = re.compile(pattern_d)
 
         # 5. 字符非ascii/语言/标点
         pattern_chars_a = r'[^' + self.ascii_pattern + self.alphabet_pattern + self.marks_pattern + ']'
         #logger.info("RE_CHAR_NOT_ASCII_LANG_MARK = " + pattern_chars_a)
-        RE_CHAR_NOT_ASCII_LANG_MARK = re.compile(pattern_chars_a)
+        patterns["re_char_not_ascii_lang_mark"] = re.compile(pattern_chars_a)
 
         # 6. 字符非英文单词/语言字母
         pattern_chars_b = r'[^' + self.english_word_pattern + self.alphabet_pattern + ']'
         #logger.info("RE_CHAR_NOT_WORD = " + pattern_chars_b)
-        RE_CHAR_NOT_WORD = re.compile(pattern_chars_b)
+        patterns["re_char_not_word"] = re.compile(pattern_chars_b)
 
         # 7. 辅助字符
         if self.diacritic_pattern:
             d_pattern = r'[' + self.diacritic_pattern + ']'
             if self.debug > 0: 
                 logger.info("RE_CHAR_DIACRITIC = " + d_pattern)
-            RE_CHAR_DIACRITIC = re.compile(d_pattern)
+            patterns["re_char_diacritic"] = re.compile(d_pattern)
 
         # 8. 括号及内容
         pattern_brackets = r'\([^()]*\)'
         #logger.info("RE_BRACKETS_CONTENT = " + pattern_brackets)
-        RE_BRACKETS_CONTENT = re.compile(pattern_brackets)
+        patterns["re_brackets_content"] = re.compile(pattern_brackets)
+
+        return patterns
+
+    def init_char_tables(self, patterns):
+        """
+        将pipeline中tn之前逐字符处理的步骤(删除辅助字符 -> 特殊数字转0-9 -> 替换非ascii/字母表/标点字符)
+        合并为一次编译好的正则扫描：正则只找出会被改动的字符，替换结果查CharTable(按需填充并缓存)，
+        与逐步调用对应的正则完全一致。返回 (正则, sub用的替换函数)
+        """
+        re_char_diacritic = patterns["re_char_diacritic"]
+        re_char_not_ascii_lang_mark = patterns["re_char_not_ascii_lang_mark"]
+        remove_diacritic = self.remove_diacritic and self.diacritic_pattern
+        remove_not_ascii_lang_mark = self.remove_not_ascii_lang_mark
+        replacement = " " * self.spaced_writing
+
+        def char_before_tn(ch):
+            if remove_diacritic and re_char_diacritic.match(ch):
+                return ""
+            ch = SPECIAL_NUM_MAP.get(ch, ch)
+            if remove_not_ascii_lang_mark and re_char_not_ascii_lang_mark.match(ch):
+                return replacement
+            return ch
+
+        char_patterns = ['[' + ''.join(SPECIAL_NUM_MAP) + ']']
+        if remove_diacritic:
+            char_patterns.append(re_char_diacritic.pattern)
+        if remove_not_ascii_lang_mark:
+            char_patterns.append(re_char_not_ascii_lang_mark.pattern)
+        table = CharTable(char_before_tn)
+        return re.compile('|'.join(char_patterns)), lambda m: table[ord(m.group())]
+
+    def compile_profile(self):
+        """
+        按当前参数编译LanguageProfile：正则、逐字符映射和map_dir中的映射规则
+        """
+        patterns = self.init_regex_patterns()
+        re_char_before_tn, fun_char_before_tn = self.init_char_tables(patterns)
 
+        # 加载map_dir中的映射文件
+        self._load_maps()
+
+        return LanguageProfile(
+            re_char_before_tn=re_char_before_tn,
+            fun_char_before_tn=fun_char_before_tn,
+            other_map_sorted=self.other_map_sorted,
+            digit_map_sorted=self.digit_map_sorted,
+            **patterns
+        )
 
     # 整行删除：若匹配pattern
     def fun_remove_lines_pattern(self, text: str, pattern: re.Pattern):
@@ -352,16 +423,16 @@ class TextNormalization_Base:
         text2 = text
         if self.remove_dashes:
             # remove all dashes          
-            text2 = re.sub(r'-+', " ", text2)
-        else:
+            text2 = RE_DASHES.sub(" ", text2)
+        elif '-' in text2:
             # remove dashes that not a word connector
-            text2 = re.sub(r'-+', r"-", text2)
-            text2 = re.sub(r'([\s\'])[-]+', r"\g<1> ", text2)
-            text2 = re.sub(r'[-]+([\s\'])', r" \g<1>", text2)
-            text2 = re.sub(r'^-', r"", text2)
-            text2 = re.sub(r'-$', r"", text2)
+            text2 = RE_DASHES.sub(r"-", text2)
+            text2 = RE_DASHES_AFTER_SPACE_QUOTE.sub(r"\g<1> ", text2)
+            text2 = RE_DASHES_BEFORE_SPACE_QUOTE.sub(r" \g<1>", text2)
+            text2 = RE_LEADING_DASH.sub(r"", text2)
+            text2 = RE_TRAILING_DASH.sub(r"", text2)
 
-        text2 = re.sub(r'[ ]+', r" ", text2)
+        text2 = RE_SPACES.sub(r" ", text2)
         
         if self.debug > 0 and text != text2:
             logger.debug(f"fun_i: {text}")
@@ -377,19 +448,19 @@ class TextNormalization_Base:
         text2 = text
         if self.remove_single_quotes:
             # remove all single quotes          
-            text2 = re.sub(r'\'+', " ", text2)
-        else:
+            text2 = RE_SINGLE_QUOTES.sub(" ", text2)
+        elif "'" in text2:
             # remove single quotes that not a word connector
-            text2 = re.sub(r'\'+', r"'", text2)
-            text2 = re.sub(r'\'+([\s-])', r" \g<1>", text2)
+            text2 = RE_SINGLE_QUOTES.sub(r"'", text2)
+            text2 = RE_QUOTES_BEFORE_SPACE_DASH.sub(r" \g<1>", text2)
             if self.allow_leading_single_quote:
-                text2 = re.sub(r'([-])\'+', r"\g<1> ", text2) # remove single quotes after dash
+                text2 = RE_QUOTES_AFTER_DASH.sub(r"\g<1> ", text2) # remove single quotes after dash
             else:
-                text2 = re.sub(r'([\s-])\'+', r"\g<1> ", text2) # remove single quotes after dash or space
-                text2 = re.sub(r'^\'', r"", text2) 
-            text2 = re.sub(r'\'$', r"", text2)
+                text2 = RE_QUOTES_AFTER_SPACE_DASH.sub(r"\g<1> ", text2) # remove single quotes after dash or space
+                text2 = RE_LEADING_QUOTE.sub(r"", text2) 
+            text2 = RE_TRAILING_QUOTE.sub(r"", text2)
 
-        text2 = re.sub(r'[ ]+', r" ", text2)
+        text2 = RE_SPACES.sub(r" ", text2)
         
         if self.debug > 0 and text != text2:
             logger.debug(f"fun_i: {text}")
@@ -434,6 +505,7 @@ class TextNormalization_Base:
     # 数据清理的pipeline
     # 多数步骤之间没有必然的顺序，但是正则化必须在阿拉伯数字的去除之前
     def pipeline(self, text):
+        profile = self.profile
 
         text = text.strip()
         
@@ -447,23 +519,28 @@ class TextNormalization_Base:
         if not text: return text
         text = fun_normalize_nfkc(text, debug=self.debug)
         
-        # 删除辅助字符
-        if not text: return text
-        if self.remove_diacritic and self.diacritic_pattern:
-            text = self.fun_remove_chars_pattern(text, RE_CHAR_DIACRITIC, "")
+        # 调试模式或需要整行删除时逐步处理，否则一次扫描完成以下字符级步骤
+        if not self.debug and not self.remove_lines:
+            if not text: return text
+            text = profile.re_char_before_tn.sub(profile.fun_char_before_tn, text)
+        else:
+            # 删除辅助字符
+            if not text: return text
+            if self.remove_diacritic and self.diacritic_pattern:
+                text = self.fun_remove_chars_pattern(text, profile.re_char_diacritic, "")
         
-        # 替换特殊的0-9专用字符到正常的0-9
-        if not text: return text
-        text = fun_convert_special_numbers_to_arabic(text, debug=self.debug)
+            # 替换特殊的0-9专用字符到正常的0-9
+            if not text: return text
+            text = fun_convert_special_numbers_to_arabic(text, debug=self.debug)
         
-        # 可选：非法字符的行，整行删除
-        if not text: return text
-        text = self.fun_remove_lines_pattern(text, RE_LINE_CONTAINS_INVALID_CHAR)
+            # 可选：非法字符的行，整行删除
+            if not text: return text
+            text = self.fun_remove_lines_pattern(text, profile.re_line_contains_invalid_char)
         
-        # 替换（非ascii/字母表/标点）字符为空格
-        if not text: return text
-        if self.remove_not_ascii_lang_mark:
-            text = self.fun_remove_chars_pattern(text, RE_CHAR_NOT_ASCII_LANG_MARK, " " * self.spaced_writing)
+            # 替换（非ascii/字母表/标点）字符为空格
+            if not text: return text
+            if self.remove_not_ascii_lang_mark:
+                text = self.fun_remove_chars_pattern(text, profile.re_char_not_ascii_lang_mark, " " * self.spaced_writing)
         
         # 简单正则化（如有更复杂需求可扩展），这一步必须将数字正规化，否则后续会被清除掉。
         if self.debug > 0:
@@ -474,8 +551,8 @@ class TextNormalization_Base:
             self.language, 
             self.map_dir, 
             self.debug, 
-            self.other_map_sorted, 
-            self.digit_map_sorted, 
+            profile.other_map_sorted, 
+            profile.digit_map_sorted, 
             self.cached_num_map,
             self.normalize_digit_maxlen
         )
@@ -484,17 +561,17 @@ class TextNormalization_Base:
 
         # 可选：删除整行（全部是标点符号等）
         if not text: return text
-        text = self.fun_remove_lines_pattern(text, RE_LINE_NO_LETTER)
+        text = self.fun_remove_lines_pattern(text, profile.re_line_no_letter)
 
         # 可选：删除括号及内容
         if not text: return text
         if self.remove_brackets:
-            text = self.fun_remove_chars_pattern(text, RE_BRACKETS_CONTENT, " " * self.spaced_writing)
+            text = self.fun_remove_chars_pattern(text, profile.re_brackets_content, " " * self.spaced_writing)
         
         # 删除非单词的字符
         if not text: return text
         if self.remove_not_word:
-            text = self.fun_remove_chars_pattern(text, RE_CHAR_NOT_WORD, " " * self.spaced_writing)
+            text = self.fun_remove_chars_pattern(text, profile.re_char_not_word, " " * self.spaced_writing)
         
         # 可选：删除英文字母
         if not text: return text
@@ -511,7 +588,7 @@ class TextNormalization_Base:
 
         # 删除整行：包含超过连续4个字符以上的单词
         if not text: return text
-        text = self.fun_remove_lines_pattern(text, RE_LINE_FOUR_CONSECUTIVE_LETTERS)
+        text = self.fun_remove_lines_pattern(text, profile.re_line_four_consecutive_letters)
 
         # 可选：大小写转换
         if not text: return text
@@ -53,21 +53,37 @@ def is_zero_width(char):
     """判断单个字符是否为零宽字符"""
     return len(char) == 1 and char in ZERO_WIDTH_CHARS
 
+class CharTable(dict):
+    """
+    供str.translate使用的按需填充映射表：首次遇到某个码点时调用fun(char)计算替换结果并缓存，
+    之后同一字符的查找都在C层的dict中完成。fun返回替换后的字符串(''表示删除)。
+    """
+    def __init__(self, fun):
+        super().__init__()
+        self.fun = fun
+
+    def __missing__(self, code):
+        value = self.fun(chr(code))
+        self[code] = value
+        return value
+
+def _replace_invisible_char(char):
+    if is_zero_width(char): # 零宽字符，有的零宽字符不一定位于C和Z类，例如\u180B \u180C
+        return ''
+    elif unicodedata.category(char)[0] in {'C', 'Z'} and char not in {'\n', '\t'}:
+        return " "
+    return char
+
+INVISIBLE_CHARS_TABLE = CharTable(_replace_invisible_char)
+
+# isprintable()为True说明不含C、Z类字符(ASCII空格除外)，只需再排除不在C、Z类中的零宽字符
+RE_ZERO_WIDTH_CHAR = re.compile('[' + ''.join(sorted(ZERO_WIDTH_CHARS)) + ']')
+
 def replace_invisible_chars(text):
-    keep_chars = {'\n', '\t'}
-    text2=""
+    if text.isprintable() and not RE_ZERO_WIDTH_CHAR.search(text):
+        return text
     # 所有unicode定义的不可见的控制字符全部替换
-    for char in text:
-        if is_zero_width(char): # 零宽字符，有的零宽字符不一定位于C和Z类，例如\u180B \u180C
-            #print(f"char = {char}, unicode = {ord(char):04x}, width = 0")
-            text2 += '' 
-        elif unicodedata.category(char)[0] in {'C', 'Z'} and char not in keep_chars:
-            #print(f"char = {char}, unicode = {ord(char):04x}, width > 0")
-            text2 += " "
-        else:
-            text2 += char
-
-    return text2
+    return text.translate(INVISIBLE_CHARS_TABLE)
 
 def str2bool(v):
     if v is None:
@@ -8,69 +8,117 @@ process_prediction.py
   - pred.txt(或自定义路径)  # 每行 key<TAB>原始回答
 输出：
   - processed_predictions_filtered.txt  # key<TAB>完整选项文本
+--stream: 先读预测，再逐行扫描 multitask.jsonl，只为预测中出现的 key 建索引（适合数 GB 的多任务文件）
 """
 
 import json
 import re
 import argparse
 
-# -------------------- 参数配置 --------------------
-parser = argparse.ArgumentParser(description="Restore full text answers from letter predictions.")
-parser.add_argument("multitask_jsonl_path", help="Path to multitask.jsonl")
-parser.add_argument("predictions_path", help="Path to predictions file (key<TAB>answer)")
-parser.add_argument("output_path", help="Output file path")
-args = parser.parse_args()
-
-multitask_jsonl_path = args.multitask_jsonl_path
-predictions_path = args.predictions_path
-output_path = args.output_path
-# -------------------------------------------------
-
-key2prompt = {}
-with open(multitask_jsonl_path, "r", encoding="utf-8") as f:
-    for line in f:
-        item = json.loads(line.strip())
-        prompt = item.get("prompt", "")
-        opts = {}
-        if prompt:
-            for ln in prompt.splitlines():
-                m = re.match(r'^\s*([A-Da-d])\.\s*(.*)$', ln)
-                if m:
-                    opts[m.group(1).upper()] = m.group(2).strip()
-        key2prompt[item["key"]] = (prompt, opts)
-
-from collections import defaultdict
-key2full = defaultdict(str)
-with open(predictions_path, "r", encoding="utf-8") as f:
-    for line in f:
-        line = line.rstrip("\n")
-        if not line or "\t" not in line:
-            continue
-        key, pred = line.split("\t", 1)
-        key2full[key] += " " + pred.strip()
-
-processed = []
-for key, full_pred in key2full.items():
-    if key not in key2prompt or not key2prompt[key][1]:  
-        processed.append((key, full_pred.strip()))
-        continue
-    _, opts = key2prompt[key]
-
-    m = re.search(r'\b([A-Da-d])\b', full_pred)
+try:
+    # 可选的快速 JSON 解析，未安装时使用标准库
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# 预编译的正则
+RE_OPTION_LINE = re.compile(r'^\s*([A-Da-d])\.\s*(.*)$')  # prompt 中的 "A. 选项" 行
+RE_OPTION_LETTER = re.compile(r'\b([A-Da-d])\b')          # 回答中的第一个独立选项字母
+RE_SPACES = re.compile(r'\s+')
+
+
+def normalize_option(text):
+    return RE_SPACES.sub(' ', text.lower())
+
+
+def option_index(prompt):
+    """
+    一个 prompt 的选项索引 (opts, by_text)：
+    opts 为 {字母: 选项文本}，by_text 为 {规范化选项文本: 字母}（相同文本取第一个选项）
+    """
+    opts = {}
+    if prompt:
+        for ln in prompt.splitlines():
+            m = RE_OPTION_LINE.match(ln)
+            if m:
+                opts[m.group(1).upper()] = m.group(2).strip()
+    by_text = {}
+    for letter, txt in opts.items():
+        by_text.setdefault(normalize_option(txt), letter)
+    return opts, by_text
+
+
+def load_option_index(multitask_jsonl_path, keys=None):
+    """
+    {key: (opts, by_text)}；给定 keys 时只保留这些 key。相同的 prompt 只解析一次
+    """
+    key2index = {}
+    parsed = {}
+    with open(multitask_jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json_loads(line)
+            key = item["key"]
+            if keys is not None and key not in keys:
+                continue
+            prompt = item.get("prompt", "")
+            index = parsed.get(prompt)
+            if index is None:
+                index = parsed[prompt] = option_index(prompt)
+            key2index[key] = index
+    return key2index
+
+
+def load_predictions(predictions_path):
+    """
+    {key: 拼接后的回答}，同一个 key 的多行回答以空格拼接，保持首次出现的顺序
+    """
+    key2full = {}
+    with open(predictions_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or "\t" not in line:
+                continue
+            key, pred = line.split("\t", 1)
+            key2full[key] = key2full.get(key, "") + " " + pred.strip()
+    return key2full
+
+
+def restore_answer(full_pred, index):
+    if index is None or not index[0]:
+        return full_pred.strip()
+    opts, by_text = index
+
+    m = RE_OPTION_LETTER.search(full_pred)
     if m and m.group(1).upper() in opts:
-        processed.append((key, opts[m.group(1).upper()]))
-        continue
-
-    pred_norm = re.sub(r'\s+', ' ', full_pred.strip().lower())
-    for txt in opts.values():
-        if pred_norm == re.sub(r'\s+', ' ', txt.lower()):
-            processed.append((key, txt))
-            break
-    else:
-        processed.append((key, full_pred.strip()))
-
-with open(output_path, "w", encoding="utf-8") as fout:
-    for k, v in processed:
-        fout.write(f"{k}\t{v}\n")
-
-print(f"Done! {len(processed)} lines written to {output_path}")
+        return opts[m.group(1).upper()]
+
+    letter = by_text.get(normalize_option(full_pred.strip()))
+    if letter is not None:
+        return opts[letter]
+    return full_pred.strip()
+
+
+def process(multitask_jsonl_path, predictions_path, output_path, stream=False):
+    key2full = load_predictions(predictions_path)
+    key2index = load_option_index(multitask_jsonl_path, keys=key2full if stream else None)
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as fout:
+        for key, full_pred in key2full.items():
+            fout.write(f"{key}\t{restore_answer(full_pred, key2index.get(key))}\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restore full text answers from letter predictions.")
+    parser.add_argument("multitask_jsonl_path", help="Path to multitask.jsonl")
+    parser.add_argument("predictions_path", help="Path to predictions file (key<TAB>answer)")
+    parser.add_argument("output_path", help="Output file path")
+    parser.add_argument("--stream", action="store_true",
+                        help="Index only the keys of the predictions while scanning multitask.jsonl (for multi-GB files)")
+    args = parser.parse_args()
+
+    count = process(args.multitask_jsonl_path, args.predictions_path, args.output_path, stream=args.stream)
+    print(f"Done! {count} lines written to {args.output_path}")
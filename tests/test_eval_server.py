@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import glob
+import threading
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVALUATION_DIR = os.path.join(os.path.dirname(TESTS_DIR), "evaluation")
+sys.path.insert(0, EVALUATION_DIR)
+
+from eval_server import EvaluationService, make_server
+from eval_client import EvaluationClient
+
+# (GT, prediction, language) fixtures scored through the server and the CLI
+FIXTURES = [
+    ("test_asr_en.jsonl", "test_asr_en.txt", "en"),
+    ("test_asr_zh.jsonl", "test_asr_zh.txt", "zh"),
+    ("test_asr_cs.jsonl", "test_asr_cs.txt", "cs"),
+    ("test_ser.jsonl", "test_ser.txt", "en"),
+    ("test_slu.jsonl", "test_slu.txt", "en"),
+    ("test_s2tt_en.jsonl", "test_s2tt_en.txt", "en")
+]
+
+
+def run_evaluation(gt_json, pred_txt, language, save_dir):
+    subprocess.run([sys.executable, os.path.join(EVALUATION_DIR, "run_evaluation.py"), gt_json, pred_txt,
+                    "--language", language, "--save_dir", save_dir],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result_files = glob.glob(os.path.join(save_dir, "*.json"))
+    assert len(result_files) == 1
+    with open(result_files[0], 'r', encoding='utf-8') as f:
+        return json.load(f)["tasks"]
+
+
+def test_unix_socket_round_trip(tmp_path):
+    unix_socket = str(tmp_path / "eval.sock")
+    service = EvaluationService(str(tmp_path / "stores"))
+    server = make_server(service, unix_socket=unix_socket)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = EvaluationClient(unix_socket=unix_socket, timeout=120)
+        assert client.health()["status"] == "ok"
+        for gt_name, pred_name, language in FIXTURES:
+            gt_json = os.path.join(TESTS_DIR, gt_name)
+            pred_txt = os.path.join(TESTS_DIR, pred_name)
+            expected = run_evaluation(gt_json, pred_txt, language, str(tmp_path / gt_name))
+            # Twice: the second request reuses the prepared GT and reference store
+            for _ in range(2):
+                response = client.score(gt_json, pred_file=pred_txt, language=language)
+                assert response["tasks"] == expected, gt_name
+        responses = client.score_many([
+            {"gt": os.path.join(TESTS_DIR, "test_asr_en.jsonl"),
+             "pred_file": os.path.join(TESTS_DIR, "test_asr_en.txt")},
+            {"gt": os.path.join(TESTS_DIR, "missing.jsonl"),
+             "pred_file": os.path.join(TESTS_DIR, "test_asr_en.txt")}
+        ])
+        assert "asr_wer" in responses[0]["tasks"]
+        assert "error" in responses[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_warm_up_builds_the_normalizers(tmp_path):
+    service = EvaluationService(str(tmp_path / "stores"))
+    assert service.warm_up("en")._preprocessor is not None
+    evaluator = service.warm_up("cs")
+    assert evaluator._codeswitch_preprocessors is not None
+    assert service.evaluator("cs") is evaluator
@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import subprocess
+
+EVALUATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "evaluation")
+
+# Importing run_evaluation measures ~0.08 s; the budget leaves room for slow machines
+IMPORT_BUDGET_S = 0.5
+HEAVY_MODULES = ("numpy", "tqdm", "sacrebleu", "meeteval", "normalization.asr", "preprocess")
+
+
+def run_in_evaluation(code):
+    """
+    Run code in a fresh interpreter from evaluation/ and return the JSON it prints.
+    """
+    output = subprocess.run([sys.executable, "-c", code], cwd=EVALUATION_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_run_evaluation_import_is_light():
+    result = run_in_evaluation(f"""
+import sys, json, time
+start = time.perf_counter()
+import run_evaluation
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": sorted(m for m in sys.modules
+                  if m in {HEAVY_MODULES!r} or m.startswith("tasks."))}}))
+""")
+    assert result["loaded"] == []
+    assert result["elapsed"] < IMPORT_BUDGET_S
+
+
+def test_task_modules_load_on_lookup():
+    result = run_in_evaluation("""
+import sys, json
+from task_registry import get_task_name, get_plugin
+name = get_task_name("ASR")
+print(json.dumps({"name": name, "plugin": get_plugin(name).name,
+                  "loaded": sorted(m for m in sys.modules if m.startswith("tasks.") or m == "numpy")}))
+""")
+    assert result["name"] == result["plugin"] == "asr_wer"
+    assert result["loaded"] == ["tasks.asr"]
+
+
+def test_plugin_modules_list_every_spelling():
+    result = run_in_evaluation("""
+import json, importlib
+from task_registry import PLUGIN_MODULES, TASK_MODULES, TASK_PLUGINS
+missing = []
+for module in PLUGIN_MODULES:
+    importlib.import_module(module)
+for plugin in TASK_PLUGINS.values():
+    for spelling in (plugin.name, plugin.task, *plugin.aliases):
+        if TASK_MODULES.get(spelling.lower()) != type(plugin).__module__:
+            missing.append(spelling)
+print(json.dumps({"missing": missing}))
+""")
+    assert result["missing"] == []
@@ -0,0 +1,44 @@
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "evaluation"))
+
+from process_prediction import process, load_option_index, load_predictions
+from tasks.slu import restore_answers
+
+GT_JSON = os.path.join(TESTS_DIR, "test_slu.jsonl")
+PRED_TXT = os.path.join(TESTS_DIR, "test_slu.txt")
+
+# Restored answers of test_slu.txt, as the original script wrote them
+EXPECTED = {
+    "pause_perception_a0937fe0-6ba7-4797-b698-8bad74a19b91": "Slow",
+    "pause_perception_b1234567-aaaa-bbbb-cccc-123456789abc": "No pause",
+    "pause_perception_c9876543-cccc-dddd-eeee-987654321fed": "children",
+    "pause_perception_d1111111-aaaa-bbbb-cccc-123456789abc": "children",
+    "pause_perception_e2222222-cccc-dddd-eeee-987654321fed": "running"
+}
+
+
+def read_output(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return dict(line.rstrip('\n').split('\t', 1) for line in f)
+
+
+def test_stream_matches_full_index(tmp_path):
+    outputs = []
+    for stream in (False, True):
+        output_path = str(tmp_path / f"stream_{stream}.txt")
+        assert process(GT_JSON, PRED_TXT, output_path, stream=stream) == len(EXPECTED)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
+    assert read_output(str(tmp_path / "stream_True.txt")) == EXPECTED
+
+
+def test_slu_task_restores_like_the_script():
+    options = load_option_index(GT_JSON)
+    pairs = list(load_predictions(PRED_TXT).items())
+    assert restore_answers(pairs, options) == {key: answer.lower() for key, answer in EXPECTED.items()}
@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import glob
+import shutil
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVALUATION_DIR = os.path.join(os.path.dirname(TESTS_DIR), "evaluation")
+sys.path.insert(0, EVALUATION_DIR)
+
+from config import CONFIG
+from evaluator import Evaluator
+from reference_store import ReferenceStore, sidecar_path
+
+
+def run_evaluation(gt_json, pred_txt, language, save_dir, *args):
+    output = subprocess.run([sys.executable, os.path.join(EVALUATION_DIR, "run_evaluation.py"), gt_json, pred_txt,
+                             "--language", language, "--save_dir", save_dir, *args],
+                            check=True, capture_output=True, text=True).stdout
+    result_files = glob.glob(os.path.join(save_dir, "*.json"))
+    assert len(result_files) == 1
+    with open(result_files[0], 'r', encoding='utf-8') as f:
+        return json.load(f)["tasks"], output
+
+
+def test_store_is_reused_until_the_references_change(tmp_path):
+    path = str(tmp_path / "refstore")
+    evaluator = Evaluator(CONFIG, language="en")
+    refs = [("en1", "He finished 1st in the race"), ("en2", "The price is $12.50")]
+    store = evaluator.reference_store(path, refs, "en")
+    assert evaluator.reference_store(path, refs, "en") is store
+    # A fresh evaluator opens the store on disk instead of rebuilding it
+    assert ReferenceStore.is_current(path, store.meta["fingerprint"])
+
+    changed = [refs[0], ("en2", "The price is $13.50")]
+    rebuilt = Evaluator(CONFIG, language="en").reference_store(path, changed, "en")
+    assert rebuilt.meta["fingerprint"] != store.meta["fingerprint"]
+    assert ReferenceStore.is_current(path, rebuilt.meta["fingerprint"])
+    assert rebuilt.tokens(0) == store.tokens(0)
+    assert rebuilt.tokens(1) != store.tokens(1)
+
+
+def test_stale_store_is_rebuilt_when_the_gt_file_changes(tmp_path):
+    gt_json = str(tmp_path / "test_asr_en.jsonl")
+    pred_txt = os.path.join(TESTS_DIR, "test_asr_en.txt")
+    shutil.copy(os.path.join(TESTS_DIR, "test_asr_en.jsonl"), gt_json)
+
+    expected, _ = run_evaluation(gt_json, pred_txt, "en", str(tmp_path / "plain"))
+    stored, output = run_evaluation(gt_json, pred_txt, "en", str(tmp_path / "stored"), "--ref_store", "auto")
+    assert os.path.isdir(sidecar_path(gt_json, "en"))
+    assert stored == expected
+
+    with open(gt_json, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records[0]["target"] = "He finished 2nd in the race"
+    with open(gt_json, 'w', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+
+    expected, _ = run_evaluation(gt_json, pred_txt, "en", str(tmp_path / "plain_changed"))
+    stored, output = run_evaluation(gt_json, pred_txt, "en", str(tmp_path / "stored_changed"), "--ref_store", "auto")
+    assert "is stale, rebuilding" in output
+    assert stored == expected
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import glob
+import subprocess
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVALUATION_DIR = os.path.join(os.path.dirname(TESTS_DIR), "evaluation")
+sys.path.insert(0, EVALUATION_DIR)
+
+from result_cache import ResultCache
+
+COUNTS = {"all": 3, "cor": 2, "sub": 1, "ins": 0, "del": 0}
+
+
+def run_evaluation(gt_json, pred_txt, language, save_dir, *args):
+    output = subprocess.run([sys.executable, os.path.join(EVALUATION_DIR, "run_evaluation.py"), gt_json, pred_txt,
+                             "--language", language, "--save_dir", save_dir, *args],
+                            check=True, capture_output=True, text=True).stdout
+    result_files = glob.glob(os.path.join(save_dir, "*.json"))
+    assert len(result_files) == 1
+    with open(result_files[0], 'r', encoding='utf-8') as f:
+        return json.load(f)["tasks"], output
+
+
+def test_fingerprint_change_drops_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, fingerprint="a")
+    key = cache.key("asr_wer:en", "a b c", "a b d")
+    cache.put_many([(key, "a b c", "a b d", COUNTS)])
+    cache.close()
+
+    # Same normalizer: a hit
+    cache = ResultCache(path, fingerprint="a")
+    assert cache.get_many([key]) == {key: ("a b c", "a b d", COUNTS)}
+    cache.close()
+
+    # New normalizer: the key changes and the old entries are gone
+    cache = ResultCache(path, fingerprint="b")
+    assert cache.key("asr_wer:en", "a b c", "a b d") != key
+    assert len(cache) == 0
+    assert cache.get_many([key]) == {}
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, max_entries=2, fingerprint="a")
+    keys = [cache.key("asr_wer:en", str(idx), str(idx)) for idx in range(3)]
+    cache.put_many([(keys[0], "0", "0", COUNTS), (keys[1], "1", "1", COUNTS)])
+    cache.close()
+
+    # A later run touches keys[1] and adds keys[2]: keys[0] is the oldest
+    cache = ResultCache(path, max_entries=2, fingerprint="a")
+    assert set(cache.get_many([keys[1]])) == {keys[1]}
+    cache.put_many([(keys[2], "2", "2", COUNTS)])
+    assert set(cache.get_many(keys)) == {keys[1], keys[2]}
+    cache.close()
+
+
+def test_cached_runs_match_uncached(tmp_path):
+    for gt_name, pred_name, language in (("test_asr_en.jsonl", "test_asr_en.txt", "en"),
+                                         ("test_asr_zh.jsonl", "test_asr_zh.txt", "zh")):
+        gt_json = os.path.join(TESTS_DIR, gt_name)
+        pred_txt = os.path.join(TESTS_DIR, pred_name)
+        cache = str(tmp_path / f"{language}.sqlite")
+        expected, _ = run_evaluation(gt_json, pred_txt, language, str(tmp_path / language))
+        first, output = run_evaluation(gt_json, pred_txt, language, str(tmp_path / f"{language}_1"), "--cache", cache)
+        assert "[Cache] 0/" in output
+        second, output = run_evaluation(gt_json, pred_txt, language, str(tmp_path / f"{language}_2"), "--cache", cache)
+        assert "[Cache] 0/" not in output
+        assert first == second == expected, gt_name
@@ -0,0 +1,43 @@
+import io
+import os
+import sys
+import contextlib
+
+import pytest
+import sacrebleu
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVALUATION_DIR = os.path.join(os.path.dirname(TESTS_DIR), "evaluation")
+sys.path.insert(0, EVALUATION_DIR)
+
+from run_evaluation import load_gt_by_task, load_pred
+from tasks.s2tt import S2ttScorer, bleu_tokenizer
+
+
+def fixture_lines(gt_name, pred_name):
+    """
+    (references, hypotheses) of an S2TT fixture, joined by key.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        columns = load_gt_by_task(os.path.join(TESTS_DIR, gt_name))["s2tt"]
+        pred_dict = load_pred(os.path.join(TESTS_DIR, pred_name))
+    return list(columns["target"]), [pred_dict.get(key, "") for key in columns["key"]]
+
+
+@pytest.mark.parametrize("gt_name, pred_name, language", [
+    ("test_s2tt_en.jsonl", "test_s2tt_en.txt", "en"),
+    ("test_s2tt_zh.jsonl", "test_s2tt_zh.txt", "zh")
+])
+def test_scorer_matches_sacrebleu(gt_name, pred_name, language):
+    refs, hyps = fixture_lines(gt_name, pred_name)
+    tokenize = bleu_tokenizer(language)
+    scorer = S2ttScorer(refs, tokenize)
+    # Twice: the second pass reuses the cached reference statistics
+    for _ in range(2):
+        bleu, chrf, sentences = scorer.score(hyps)
+        assert bleu.score == pytest.approx(sacrebleu.corpus_bleu(hyps, [refs], tokenize=tokenize).score)
+        assert chrf.score == pytest.approx(sacrebleu.corpus_chrf(hyps, [refs], word_order=2).score)
+        assert len(sentences) == len(refs)
+        for (sentence_bleu, sentence_chrf), ref, hyp in zip(sentences, refs, hyps):
+            assert sentence_bleu == pytest.approx(sacrebleu.sentence_bleu(hyp, [ref], tokenize=tokenize).score)
+            assert sentence_chrf == pytest.approx(sacrebleu.sentence_chrf(hyp, [ref], word_order=2).score)
@@ -0,0 +1,84 @@
+import io
+import os
+import sys
+import contextlib
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EVALUATION_DIR = os.path.join(os.path.dirname(TESTS_DIR), "evaluation")
+sys.path.insert(0, EVALUATION_DIR)
+
+from config import CONFIG
+from evaluator import Evaluator
+from run_evaluation import load_gt_by_task, load_pred, build_task_data
+from task_registry import get_task_name
+
+OPTIONS = {"workers": 1, "export_dir": None, "cs_alignment": "single", "cache": None, "ref_store": None}
+
+
+def score_fixture(evaluator, gt_name, pred_name, language, tmp_path):
+    """
+    {task name: Evaluator.run result} of every task of a fixture GT file,
+    as run_evaluation prepares them.
+    """
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        task_dict = load_gt_by_task(os.path.join(TESTS_DIR, gt_name))
+        pred_dict = load_pred(os.path.join(TESTS_DIR, pred_name))
+        for task, columns in task_dict.items():
+            task_name = get_task_name(task)
+            data = build_task_data(task, task_name, columns, pred_dict, OPTIONS, str(tmp_path))
+            results[task_name] = evaluator.run(task_name, data, language)
+    return results
+
+
+def test_codeswitch_preprocessors_are_built_once(tmp_path):
+    evaluator = Evaluator(CONFIG, language="cs")
+    first = score_fixture(evaluator, "test_asr_cs.jsonl", "test_asr_cs.txt", "cs", tmp_path)
+    procs = evaluator.codeswitch_preprocessors
+    assert [proc.lang for proc in procs] == ["en", "zh"]
+    assert score_fixture(evaluator, "test_asr_cs.jsonl", "test_asr_cs.txt", "cs", tmp_path) == first
+    assert evaluator.codeswitch_preprocessors is procs
+
+
+def test_label_metrics_on_fixtures(tmp_path):
+    evaluator = Evaluator(CONFIG, language="en")
+    for gt_name, pred_name, task_name, accuracy in (("test_ser.jsonl", "test_ser.txt", "ser_eval", 1.0),
+                                                   ("test_gr.jsonl", "test_gr.txt", "gr_eval", 0.8)):
+        result = score_fixture(evaluator, gt_name, pred_name, "en", tmp_path)[task_name]
+        confusion = result["confusion_matrix"]
+        assert result["accuracy"] == accuracy
+        assert result["total"] == sum(map(sum, confusion)) == 5
+        assert result["correct"] == sum(confusion[idx][idx] for idx in range(len(confusion)))
+        assert list(result["per_class"]) == result["labels"]
+        for idx, label in enumerate(result["labels"]):
+            stats = result["per_class"][label]
+            assert stats["support"] == sum(confusion[idx])
+            if stats["support"]:
+                assert stats["recall"] == confusion[idx][idx] / sum(confusion[idx])
+
+
+def test_stray_labels_stay_local_to_the_run():
+    evaluator = Evaluator(CONFIG, language="en")
+    classes = evaluator.ser_labels.classes
+    first = evaluator.run("ser_eval", {"records": [("a", "happy", "bored"), ("b", "scared", "scared")]})
+    assert first["labels"] == ["hap", "bored", "scared"]
+    assert evaluator.ser_labels.classes == classes == ("neu", "hap", "ang", "sad")
+    # A later run numbers its own extra labels from scratch
+    second = evaluator.run("ser_eval", {"records": [("a", "calm", "calm"), ("b", "sad", "9")]})
+    fresh = Evaluator(CONFIG, language="en").run("ser_eval", {"records": [("a", "calm", "calm"), ("b", "sad", "9")]})
+    assert second == fresh
+    assert second["labels"] == ["calm"]
+
+
+def test_slu_accuracy_on_fixture(tmp_path):
+    evaluator = Evaluator(CONFIG, language="en")
+    assert score_fixture(evaluator, "test_slu.jsonl", "test_slu.txt", "en", tmp_path) == {"slu_eval": 0.6}
+    # The file input: ref/hyp files with the prompts read from the GT JSONL
+    gt_json = os.path.join(TESTS_DIR, "test_slu.jsonl")
+    with contextlib.redirect_stdout(io.StringIO()):
+        columns = load_gt_by_task(gt_json)["slu"]
+    ref_file = tmp_path / "ref.txt"
+    ref_file.write_text(''.join(f"{key}\t{ref}\n" for key, ref in zip(columns["key"], columns["target"])),
+                        encoding='utf-8')
+    data = {"ref_file": str(ref_file), "hyp_file": os.path.join(TESTS_DIR, "test_slu.txt"), "prompt_jsonl": gt_json}
+    assert evaluator.run("slu_eval", data) == 0.6
@@ -0,0 +1,127 @@
+import os
+import sys
+import random
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "evaluation"))
+
+from wenet_compute_cer import Calculator, Vocabulary, edit_counts
+from tasks.batch_wer import batch_edit_counts
+
+TOKENS = ["a", "b", "c", "d", "你", "好"]
+
+
+def baseline_alignment(lab, rec):
+    """
+    The dict-of-dicts DP of the original Calculator.calculate: ties prefer
+    del, then ins, then cor/sub. Returns its (lab, rec) alignment and counts.
+    """
+    lab = [''] + lab
+    rec = [''] + rec
+    space = [[{'dist': 0, 'error': 'non'} for _ in rec] for _ in lab]
+    for i in range(len(lab)):
+        space[i][0] = {'dist': i, 'error': 'del'}
+    for j in range(len(rec)):
+        space[0][j] = {'dist': j, 'error': 'ins'}
+    space[0][0]['error'] = 'non'
+    for i in range(1, len(lab)):
+        for j in range(1, len(rec)):
+            min_dist = space[i - 1][j]['dist'] + 1
+            min_error = 'del'
+            if space[i][j - 1]['dist'] + 1 < min_dist:
+                min_dist = space[i][j - 1]['dist'] + 1
+                min_error = 'ins'
+            cor = lab[i] == rec[j]
+            dist = space[i - 1][j - 1]['dist'] + (0 if cor else 1)
+            if dist < min_dist:
+                min_dist = dist
+                min_error = 'cor' if cor else 'sub'
+            space[i][j] = {'dist': min_dist, 'error': min_error}
+    result = {'lab': [], 'rec': [], 'all': 0, 'cor': 0, 'sub': 0, 'ins': 0, 'del': 0}
+    i = len(lab) - 1
+    j = len(rec) - 1
+    while space[i][j]['error'] != 'non':
+        error = space[i][j]['error']
+        result[error] += 1
+        if error != 'ins':
+            result['all'] += 1
+        result['lab'].insert(0, lab[i] if error != 'ins' else "")
+        result['rec'].insert(0, rec[j] if error != 'del' else "")
+        if error != 'ins':
+            i -= 1
+        if error != 'del':
+            j -= 1
+    return result
+
+
+def random_pairs(count=300, seed=0):
+    """
+    Random (lab, rec) token lists, including empty ones on either side.
+    """
+    rng = random.Random(seed)
+    pairs = [([], []), (["a"], []), ([], ["a"])]
+    for _ in range(count):
+        pairs.append(([rng.choice(TOKENS) for _ in range(rng.randint(0, 12))],
+                      [rng.choice(TOKENS) for _ in range(rng.randint(0, 12))]))
+    return pairs
+
+
+def test_calculate_matches_baseline_dp():
+    calculator = Calculator()
+    for lab, rec in random_pairs():
+        assert calculator.calculate(list(lab), list(rec)) == baseline_alignment(lab, rec), (lab, rec)
+
+
+def test_edit_counts_match_baseline_dp():
+    calculator = Calculator()
+    for lab, rec in random_pairs(seed=2):
+        ids = calculator.vocab.encode(lab), calculator.vocab.encode(rec)
+        expected = baseline_alignment(lab, rec)
+        # Both orientations of the single-line DP: along lab or along rec
+        assert edit_counts(*ids, calculator.cost) == {error: expected[error] for error in
+                                                      ('all', 'cor', 'sub', 'ins', 'del')}, (lab, rec)
+
+
+def test_compute_wer_modes_agree(tmp_path):
+    from tasks.asr_wer import compute_wer
+    ref_file = tmp_path / "ref.txt"
+    hyp_file = tmp_path / "hyp.txt"
+    pairs = random_pairs(count=50, seed=3)
+    ref_file.write_text(''.join(f"utt{idx} {' '.join(lab)}\n" for idx, (lab, _) in enumerate(pairs)), encoding='utf-8')
+    hyp_file.write_text(''.join(f"utt{idx} {' '.join(rec)}\n" for idx, (_, rec) in enumerate(pairs)), encoding='utf-8')
+    counts = compute_wer(str(ref_file), str(hyp_file))
+    assert compute_wer(str(ref_file), str(hyp_file), mode="align") == counts
+    assert compute_wer(str(ref_file), str(hyp_file), batch=True) == counts
+
+
+def test_batch_edit_counts_match_baseline_dp():
+    pairs = random_pairs(seed=1)
+    vocab = Vocabulary()
+    ids = [(vocab.encode(lab), vocab.encode(rec)) for lab, rec in pairs]
+    # A small batch_size and max_cells spread the pairs over many buckets
+    for results in (batch_edit_counts(ids), batch_edit_counts(ids, batch_size=7, max_cells=64)):
+        for (lab, rec), result in zip(pairs, results):
+            expected = baseline_alignment(lab, rec)
+            assert result == {error: expected[error] for error in result}, (lab, rec)
+
+
+def test_sharded_token_stats_match_single_process():
+    from tasks.asr_wer import utterance_counts
+    pairs = [(f"utt{idx}", ' '.join(lab), ' '.join(rec)) for idx, (lab, rec) in enumerate(random_pairs(seed=4))]
+    stats = []
+    for workers in (1, 4):
+        calculator = Calculator()
+        results = utterance_counts(pairs, workers=workers, mode="align", calculator=calculator)
+        stats.append((results, calculator.data, calculator.overall(),
+                      calculator.cluster(["a", "b"]), calculator.cluster(["你", "好"])))
+    assert stats[0] == stats[1]
+    results, _, overall, _, _ = stats[0]
+    assert overall == {error: sum(result[error] for result in results) for error in overall}
+
+
+def test_token_stats_skip_the_empty_token():
+    calculator = Calculator()
+    calculator.calculate(["a", "", "b"], ["a", "c"])
+    assert set(calculator.data) == {"a", "b", "c"}
+    assert calculator.keys() == list(calculator.data)
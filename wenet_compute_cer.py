@@ -3,6 +3,9 @@
 
 import re, sys, unicodedata
 import codecs
+from array import array as id_array  # the __main__ block below rebinds 'array'
+
+import numpy as np
 
 remove_tag = True
 spacelist = [' ', '\t', '\r', '\n']
@@ -82,82 +85,230 @@ def normalize(sentence, ignore_words, cs, split=None):
     return new_sentence
 
 
+# Backpointer codes of the alignment engine, one byte per DP cell.
+OP_NON = 0
+OP_COR = 1
+OP_SUB = 2
+OP_DEL = 3
+OP_INS = 4
+
+
+class Vocabulary:
+    """ interns tokens into consecutive integer ids, shared by every utterance
+    (and every Calculator) that scores against it
+    """
+
+    def __init__(self, tokens=()):
+        self.ids = {}
+        self.tokens = []
+        for token in tokens:
+            self.intern(token)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __getstate__(self):
+        return self.tokens
+
+    def __setstate__(self, tokens):
+        self.tokens = tokens
+        self.ids = {token: idx for idx, token in enumerate(tokens)}
+
+    def intern(self, token):
+        idx = self.ids.get(token)
+        if idx is None:
+            idx = self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return idx
+
+    def encode(self, tokens):
+        return id_array('i', [self.intern(t) for t in tokens])
+
+
+def edit_ops(lab_ids, rec_ids, cost):
+    """ fill the Levenshtein grid of two id sequences and return its backpointers
+    as a flat bytearray of (len(lab_ids) + 1) * (len(rec_ids) + 1) cells.
+
+    Distances only need two rows; ties prefer del, then ins, then cor/sub,
+    exactly like the original dict-of-dicts implementation.
+    """
+    n = len(lab_ids)
+    m = len(rec_ids)
+    w = m + 1
+    c_cor = cost['cor']
+    c_sub = cost['sub']
+    c_del = cost['del']
+    c_ins = cost['ins']
+    ops = bytearray(w * (n + 1))
+    prev = id_array('i', range(w))
+    cur = id_array('i', [0]) * w
+    for j in range(1, w):
+        ops[j] = OP_INS
+    for i in range(1, n + 1):
+        base = i * w
+        ops[base] = OP_DEL
+        cur[0] = i
+        lab_id = lab_ids[i - 1]
+        for j in range(1, w):
+            min_dist = prev[j] + c_del
+            min_op = OP_DEL
+            dist = cur[j - 1] + c_ins
+            if dist < min_dist:
+                min_dist = dist
+                min_op = OP_INS
+            if lab_id == rec_ids[j - 1]:
+                dist = prev[j - 1] + c_cor
+                op = OP_COR
+            else:
+                dist = prev[j - 1] + c_sub
+                op = OP_SUB
+            if dist < min_dist:
+                min_dist = dist
+                min_op = op
+            cur[j] = min_dist
+            ops[base + j] = min_op
+        prev, cur = cur, prev
+    return ops
+
+
+def edit_counts(lab_ids, rec_ids, cost):
+    """ compute the cor/sub/del/ins counts of the alignment edit_ops would trace
+    back, without keeping backpointers.
+
+    Every cell packs (dist, sub, del, ins) of its chosen path into one int,
+    dist in the highest field so that `x < (y & mask)` compares distances only.
+    Just one line of cells is kept, running along the shorter sequence, so
+    memory is O(min(n, m)).
+    """
+    n = len(lab_ids)
+    m = len(rec_ids)
+    bits = ((n + m) * max(max(cost.values()), 1) + 1).bit_length()
+    one_ins = 1
+    one_del = 1 << bits
+    one_sub = 1 << (2 * bits)
+    one_dist = 1 << (3 * bits)
+    mask = -one_dist
+    step_del = cost['del'] * one_dist + one_del
+    step_ins = cost['ins'] * one_dist + one_ins
+    step_cor = cost['cor'] * one_dist
+    step_sub = cost['sub'] * one_dist + one_sub
+    if m <= n:
+        # row by row over lab, the line is indexed by the rec position
+        prev = [j * (one_dist + one_ins) for j in range(m + 1)]
+        for i in range(1, n + 1):
+            left = i * (one_dist + one_del)
+            cur = [left]
+            lab_id = lab_ids[i - 1]
+            for j in range(m):
+                best = prev[j + 1] + step_del
+                dist = left + step_ins
+                if dist < (best & mask):
+                    best = dist
+                dist = prev[j] + (step_cor if lab_id == rec_ids[j] else step_sub)
+                if dist < (best & mask):
+                    best = dist
+                cur.append(best)
+                left = best
+            prev = cur
+    else:
+        # column by column over rec, the line is indexed by the lab position
+        prev = [i * (one_dist + one_del) for i in range(n + 1)]
+        for j in range(1, m + 1):
+            up = j * (one_dist + one_ins)
+            cur = [up]
+            rec_id = rec_ids[j - 1]
+            for i in range(n):
+                best = up + step_del
+                dist = prev[i + 1] + step_ins
+                if dist < (best & mask):
+                    best = dist
+                dist = prev[i] + (step_cor if lab_ids[i] == rec_id else step_sub)
+                if dist < (best & mask):
+                    best = dist
+                cur.append(best)
+                up = best
+            prev = cur
+    cell = prev[-1]
+    field = one_del - 1
+    ins = cell & field
+    dels = (cell >> bits) & field
+    sub = (cell >> (2 * bits)) & field
+    return {
+        'all': n,
+        'cor': n - sub - dels,
+        'sub': sub,
+        'ins': ins,
+        'del': dels
+    }
+
+
+# Rows of Calculator.counts
+ERRORS = ('all', 'cor', 'sub', 'ins', 'del')
+
+
 class Calculator:
 
-    def __init__(self):
-        self.data = {}
-        self.space = []
+    def __init__(self, vocab=None):
+        self.vocab = vocab if vocab is not None else Vocabulary()
         self.cost = {}
         self.cost['cor'] = 0
         self.cost['sub'] = 1
         self.cost['del'] = 1
         self.cost['ins'] = 1
+        # per-token statistics: one row per error type, one column per token id,
+        # plus a mask of the ids this Calculator has seen
+        self.counts = np.zeros((len(ERRORS), 0), dtype=np.int64)
+        self.seen = np.zeros(0, dtype=bool)
+        # ids traced back since the last flush, one array per error type
+        self._pending = {error: id_array('i') for error in ERRORS[1:]}
+        self._pending_seen = id_array('i')
+
+    def _flush(self):
+        size = len(self.vocab)
+        if size > self.counts.shape[1]:
+            counts = np.zeros((len(ERRORS), size), dtype=np.int64)
+            counts[:, :self.counts.shape[1]] = self.counts
+            seen = np.zeros(size, dtype=bool)
+            seen[:self.seen.shape[0]] = self.seen
+            self.counts = counts
+            self.seen = seen
+        if self._pending_seen:
+            self.seen[np.frombuffer(self._pending_seen, dtype=np.int32)] = True
+            self._pending_seen = id_array('i')
+        for row, error in enumerate(ERRORS[1:], 1):
+            ids = self._pending[error]
+            if ids:
+                self.counts[row] += np.bincount(np.frombuffer(ids, dtype=np.int32), minlength=size)
+                self._pending[error] = id_array('i')
+        self.counts[0] = self.counts[1] + self.counts[2] + self.counts[4]
+
+    @property
+    def data(self):
+        """ per-token statistics as {token: {'all', 'cor', 'sub', 'ins', 'del'}},
+        for the non-empty tokens this Calculator has seen
+        """
+        self._flush()
+        tokens = self.vocab.tokens
+        counts = self.counts.T.tolist()
+        return {
+            tokens[idx]: dict(zip(ERRORS, counts[idx]))
+            for idx in np.flatnonzero(self.seen).tolist()
+            if tokens[idx]
+        }
 
     def calculate(self, lab, rec):
-        # Initialization
-        lab.insert(0, '')
-        rec.insert(0, '')
-        while len(self.space) < len(lab):
-            self.space.append([])
-        for row in self.space:
-            for element in row:
-                element['dist'] = 0
-                element['error'] = 'non'
-            while len(row) < len(rec):
-                row.append({'dist': 0, 'error': 'non'})
-        for i in range(len(lab)):
-            self.space[i][0]['dist'] = i
-            self.space[i][0]['error'] = 'del'
-        for j in range(len(rec)):
-            self.space[0][j]['dist'] = j
-            self.space[0][j]['error'] = 'ins'
-        self.space[0][0]['error'] = 'non'
-        for token in lab:
-            if token not in self.data and len(token) > 0:
-                self.data[token] = {
-                    'all': 0,
-                    'cor': 0,
-                    'sub': 0,
-                    'ins': 0,
-                    'del': 0
-                }
-        for token in rec:
-            if token not in self.data and len(token) > 0:
-                self.data[token] = {
-                    'all': 0,
-                    'cor': 0,
-                    'sub': 0,
-                    'ins': 0,
-                    'del': 0
-                }
+        return self.calculate_ids(self.vocab.encode(lab), self.vocab.encode(rec))
+
+    def calculate_ids(self, lab_ids, rec_ids):
+        """ align two id sequences of self.vocab; the returned 'lab'/'rec'
+        alignment holds the tokens themselves
+        """
+        tokens = self.vocab.tokens
+        empty = self.vocab.ids.get('')
+        self._pending_seen.extend(lab_ids)
+        self._pending_seen.extend(rec_ids)
         # Computing edit distance
-        for i, lab_token in enumerate(lab):
-            for j, rec_token in enumerate(rec):
-                if i == 0 or j == 0:
-                    continue
-                min_dist = sys.maxsize
-                min_error = 'none'
-                dist = self.space[i - 1][j]['dist'] + self.cost['del']
-                error = 'del'
-                if dist < min_dist:
-                    min_dist = dist
-                    min_error = error
-                dist = self.space[i][j - 1]['dist'] + self.cost['ins']
-                error = 'ins'
-                if dist < min_dist:
-                    min_dist = dist
-                    min_error = error
-                if lab_token == rec_token:
-                    dist = self.space[i - 1][j - 1]['dist'] + self.cost['cor']
-                    error = 'cor'
-                else:
-                    dist = self.space[i - 1][j - 1]['dist'] + self.cost['sub']
-                    error = 'sub'
-                if dist < min_dist:
-                    min_dist = dist
-                    min_error = error
-                self.space[i][j]['dist'] = min_dist
-                self.space[i][j]['error'] = min_error
+        ops = edit_ops(lab_ids, rec_ids, self.cost)
         # Tracing back
         result = {
             'lab': [],
@@ -168,73 +319,89 @@ class Calculator:
             'ins': 0,
             'del': 0
         }
-        i = len(lab) - 1
-        j = len(rec) - 1
+        pending = self._pending
+        w = len(rec_ids) + 1
+        i = len(lab_ids)
+        j = len(rec_ids)
         while True:
-            if self.space[i][j]['error'] == 'cor':  # correct
-                if len(lab[i]) > 0:
-                    self.data[lab[i]]['all'] = self.data[lab[i]]['all'] + 1
-                    self.data[lab[i]]['cor'] = self.data[lab[i]]['cor'] + 1
+            op = ops[i * w + j]
+            if op == OP_COR or op == OP_SUB:  # correct or substitution
+                error = 'cor' if op == OP_COR else 'sub'
+                token = lab_ids[i - 1]
+                if token != empty:
+                    pending[error].append(token)
                     result['all'] = result['all'] + 1
-                    result['cor'] = result['cor'] + 1
-                result['lab'].insert(0, lab[i])
-                result['rec'].insert(0, rec[j])
+                    result[error] = result[error] + 1
+                result['lab'].append(tokens[token])
+                result['rec'].append(tokens[rec_ids[j - 1]])
                 i = i - 1
                 j = j - 1
-            elif self.space[i][j]['error'] == 'sub':  # substitution
-                if len(lab[i]) > 0:
-                    self.data[lab[i]]['all'] = self.data[lab[i]]['all'] + 1
-                    self.data[lab[i]]['sub'] = self.data[lab[i]]['sub'] + 1
-                    result['all'] = result['all'] + 1
-                    result['sub'] = result['sub'] + 1
-                result['lab'].insert(0, lab[i])
-                result['rec'].insert(0, rec[j])
-                i = i - 1
-                j = j - 1
-            elif self.space[i][j]['error'] == 'del':  # deletion
-                if len(lab[i]) > 0:
-                    self.data[lab[i]]['all'] = self.data[lab[i]]['all'] + 1
-                    self.data[lab[i]]['del'] = self.data[lab[i]]['del'] + 1
+            elif op == OP_DEL:  # deletion
+                token = lab_ids[i - 1]
+                if token != empty:
+                    pending['del'].append(token)
                     result['all'] = result['all'] + 1
                     result['del'] = result['del'] + 1
-                result['lab'].insert(0, lab[i])
-                result['rec'].insert(0, "")
+                result['lab'].append(tokens[token])
+                result['rec'].append("")
                 i = i - 1
-            elif self.space[i][j]['error'] == 'ins':  # insertion
-                if len(rec[j]) > 0:
-                    self.data[rec[j]]['ins'] = self.data[rec[j]]['ins'] + 1
+            elif op == OP_INS:  # insertion
+                token = rec_ids[j - 1]
+                if token != empty:
+                    pending['ins'].append(token)
                     result['ins'] = result['ins'] + 1
-                result['lab'].insert(0, "")
-                result['rec'].insert(0, rec[j])
+                result['lab'].append("")
+                result['rec'].append(tokens[token])
                 j = j - 1
-            elif self.space[i][j]['error'] == 'non':  # starting point
+            else:  # starting point
                 break
-            else:  # shouldn't reach here
-                print(
-                    'this should not happen , i = {i} , j = {j} , error = {error}'
-                    .format(i=i, j=j, error=self.space[i][j]['error']))
+        result['lab'].reverse()
+        result['rec'].reverse()
         return result
 
+    def merge(self, data):
+        """ add the per-token statistics of another Calculator (e.g. one that
+        scored a different shard of utterances) into this one; data is either
+        that Calculator or its `data` dict
+        """
+        if isinstance(data, Calculator):
+            if data.vocab is self.vocab:
+                data._flush()
+                self.merge_counts(data.counts, data.seen)
+                return
+            data = data.data
+        for token, stats in data.items():
+            idx = self.vocab.intern(token)
+            self._pending_seen.append(idx)
+            for error in ERRORS[1:]:
+                self._pending[error].extend([idx] * stats[error])
+
+    def count_arrays(self):
+        """ (counts, seen) arrays indexed by the ids of self.vocab, e.g. to be
+        sent back from a worker process and merged with merge_counts
+        """
+        self._flush()
+        return self.counts, self.seen
+
+    def merge_counts(self, counts, seen):
+        """ add count/seen arrays indexed by the ids of self.vocab
+        """
+        self._flush()
+        size = counts.shape[1]
+        self.counts[:, :size] += counts
+        self.seen[:size] |= seen
+
     def overall(self):
-        result = {'all': 0, 'cor': 0, 'sub': 0, 'ins': 0, 'del': 0}
-        for token in self.data:
-            result['all'] = result['all'] + self.data[token]['all']
-            result['cor'] = result['cor'] + self.data[token]['cor']
-            result['sub'] = result['sub'] + self.data[token]['sub']
-            result['ins'] = result['ins'] + self.data[token]['ins']
-            result['del'] = result['del'] + self.data[token]['del']
-        return result
+        self._flush()
+        totals = self.counts.sum(axis=1).tolist()
+        return dict(zip(ERRORS, totals))
 
     def cluster(self, data):
-        result = {'all': 0, 'cor': 0, 'sub': 0, 'ins': 0, 'del': 0}
-        for token in data:
-            if token in self.data:
-                result['all'] = result['all'] + self.data[token]['all']
-                result['cor'] = result['cor'] + self.data[token]['cor']
-                result['sub'] = result['sub'] + self.data[token]['sub']
-                result['ins'] = result['ins'] + self.data[token]['ins']
-                result['del'] = result['del'] + self.data[token]['del']
-        return result
+        self._flush()
+        ids = [self.vocab.ids[token] for token in data if token in self.vocab.ids]
+        ids = [idx for idx in ids if self.seen[idx]]
+        totals = self.counts[:, ids].sum(axis=1).tolist()
+        return dict(zip(ERRORS, totals))
 
     def keys(self):
         return list(self.data.keys())